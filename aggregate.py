@@ -0,0 +1,132 @@
+"""Aggregations over csv logs too large to load at once.
+
+The log is read in chunks of a bounded number of rows and every chunk is
+reduced to partial sums before the next one is read, so peak memory depends
+on the chunk size and the number of groups, not on the length of the log.
+"""
+import json
+import os
+
+from storage import GROUP_COLUMNS, open_storage, parse_durations
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def iter_chunks(path: str, columns: list, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Yield the log in DataFrames of at most chunksize rows, only the given columns"""
+    import pandas as pd
+
+    dtypes = {column: str for column in columns}
+    yield from pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize)
+
+
+def partial_totals(chunks, by: list):
+    """Reduce every chunk to the total time per group, one Series per grouping"""
+    for chunk in chunks:
+        durations = parse_durations(chunk["total_time"])
+        yield {column: durations.groupby(chunk[column]).sum() for column in by}
+
+
+def merge_totals(partials, by: list) -> dict:
+    """Sum the partial totals of all the chunks"""
+    import pandas as pd
+
+    totals = {column: pd.Series(dtype="timedelta64[ns]", name="total_time") for column in by}
+    for partial in partials:
+        for column in by:
+            totals[column] = totals[column].add(partial[column], fill_value=pd.Timedelta(0))
+
+    for column in by:
+        totals[column] = totals[column].sort_index().rename("total_time").rename_axis(column)
+    return totals
+
+
+def stream_totals(path: str, by=GROUP_COLUMNS, chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """Total time per day, subject and session of a csv log, read chunk by chunk"""
+    by = [by] if isinstance(by, str) else list(by)
+    for column in by:
+        if column not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by {column}. Please choose from: {GROUP_COLUMNS}")
+
+    chunks = iter_chunks(path, by + ["total_time"], chunksize)
+    return merge_totals(partial_totals(chunks, by), by)
+
+
+# Per-file totals of multi-log reports, reused while a file is unchanged
+MULTI_LOG_CACHE = "./Logs/.multi_log_cache.json"
+
+
+def expand_logs(patterns: list) -> list:
+    """Log files matching a list of directories, files or glob patterns"""
+    import glob
+
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.csv")) + glob.glob(os.path.join(pattern, "*.db"))
+        else:
+            matches = glob.glob(pattern)
+        paths.extend(os.path.abspath(path) for path in sorted(matches))
+
+    # Keep the first occurrence of every file
+    return list(dict.fromkeys(paths))
+
+
+def file_totals(path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """Totals of one log as plain dicts of nanoseconds, so they can be pickled and cached"""
+    storage = open_storage(path)
+    if storage.queries_in_sql:
+        totals = {column: storage.total_by(column) for column in GROUP_COLUMNS}
+    else:
+        totals = stream_totals(path, GROUP_COLUMNS, chunksize)
+    return {column: {str(key): int(total.value) for key, total in series.items()} for column, series in totals.items()}
+
+
+def aggregate_logs(paths: list, workers: int = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                   cache_path: str = MULTI_LOG_CACHE) -> tuple:
+    """Team-wide totals by day, subject and session of many logs.
+
+    Changed files are aggregated in a process pool, unchanged ones are read from
+    the cache. Return the totals, one timedelta Series per grouping, and the
+    number of files that had to be parsed.
+    """
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+
+    cache = _load_cache(cache_path)
+    signatures = {path: list(open_storage(path).signature()) for path in paths}
+    stale = [path for path in paths if cache.get(path, {}).get("signature") != signatures[path]]
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, totals in zip(stale, pool.map(file_totals, stale, [chunksize] * len(stale))):
+                cache[path] = {"signature": signatures[path], "totals": totals}
+        _save_cache(cache_path, cache)
+
+    # Merge the per-file totals
+    merged = {column: {} for column in GROUP_COLUMNS}
+    for path in paths:
+        for column, totals in cache[path]["totals"].items():
+            for key, total in totals.items():
+                merged[column][key] = merged[column].get(key, 0) + total
+
+    totals = {column: pd.Series(pd.to_timedelta(list(values.values()), unit="ns"),
+                                index=pd.Index(list(values.keys()), name=column), name="total_time").sort_index()
+              for column, values in merged.items()}
+    return totals, len(stale)
+
+
+def _load_cache(cache_path: str) -> dict:
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_path: str, cache: dict):
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, cache_path)
@@ -0,0 +1,57 @@
+"""Pause and efficiency metrics of every day of a log, computed in one pass.
+
+The definitions match the summary printed after a session: the pauses of a
+day are the time between its first start and last end not spent studying,
+and the efficiency is the studied share of that time.
+"""
+from datetime import timedelta
+
+
+def day_stats(rows_today: list) -> tuple:
+    """Studied time, pauses and last pause of the sessions of one day, as dicts in start order"""
+    if len(rows_today) == 0:
+        return timedelta(0), timedelta(0), timedelta(0)
+
+    total_studied = sum((row["total_time"] for row in rows_today), timedelta(0))
+    total_pauses = max(row["end_time"] for row in rows_today) - min(row["start_time"] for row in rows_today) - total_studied
+
+    # last begin - penultimate end
+    if len(rows_today) > 1:
+        last_pause = rows_today[-1]["start_time"] - rows_today[-2]["end_time"]
+    else:
+        last_pause = timedelta(0)
+    return total_studied, total_pauses, last_pause
+
+
+def session_gaps(df_log: "pd.DataFrame") -> "pd.Series":
+    """Break before every session since the previous one of the same day ended, NaT for the first"""
+    previous_end = df_log.groupby("day", observed=True, sort=False)["end_time"].shift()
+    return (df_log["start_time"] - previous_end).rename("gap")
+
+
+def pause_history(df_log: "pd.DataFrame") -> "pd.DataFrame":
+    """Sessions, studied time, pauses, longest and last break and efficiency of every day"""
+    import pandas as pd
+
+    # Gaps need the sessions of a day in start order
+    if not df_log["start_time"].is_monotonic_increasing:
+        df_log = df_log.sort_values("start_time", kind="stable")
+
+    df_gaps = df_log[["day", "start_time", "end_time", "total_time"]].assign(gap=session_gaps(df_log))
+    history = df_gaps.groupby("day", observed=True).agg(
+        sessions=("total_time", "size"),
+        studied=("total_time", "sum"),
+        first_start=("start_time", "min"),
+        last_end=("end_time", "max"),
+        longest_break=("gap", "max"),
+        last_pause=("gap", "last"),
+    )
+
+    # Days with a single session had no break
+    history["longest_break"] = history["longest_break"].fillna(pd.Timedelta(0))
+    history["last_pause"] = history["last_pause"].fillna(pd.Timedelta(0))
+
+    history["pauses"] = history.pop("last_end") - history.pop("first_start") - history["studied"]
+    span = history["studied"] + history["pauses"]
+    history["efficiency"] = (history["studied"] / span).where(span > pd.Timedelta(0))
+    return history[["sessions", "studied", "pauses", "longest_break", "last_pause", "efficiency"]]
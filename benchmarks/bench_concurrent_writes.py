@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Stress test: many processes saving sessions into the same csv log at once.
+
+    python benchmarks/bench_concurrent_writes.py --writers 8 --sessions 200
+    python benchmarks/bench_concurrent_writes.py --writers 8 --sessions 200 --unlocked
+
+Every writer appends its sessions as fast as it can, all starting together.
+The log is then checked for lost rows and duplicate ids. --unlocked appends
+without the lock and the spool, the way every process used to write.
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage import CSVStorage, _csv_row
+from utils import append_csv_rows
+
+
+def session(writer: int, number: int) -> dict:
+    """A distinct session of every writer, one minute apart"""
+    start_time = datetime(2025, 1, 1, 8) + timedelta(minutes=number, microseconds=writer)
+    end_time = start_time + timedelta(seconds=50)
+    return {"day": start_time.date(), "start_time": start_time, "end_time": end_time,
+            "total_time": end_time - start_time, "session": "Morning", "subject": "Thesis"}
+
+
+def writer_process(path: str, writer: int, sessions: int, unlocked: bool, barrier, results):
+    storage = CSVStorage(path)
+    barrier.wait()
+    row_ids = []
+    for number in range(sessions):
+        data = session(writer, number)
+        if unlocked:
+            row_id = storage.next_id()
+            append_csv_rows(path, [_csv_row(row_id, data)])
+        else:
+            row_id = storage.append(data)
+        row_ids.append(row_id)
+    results.put(row_ids)
+
+
+def check_log(path: str, writers: int, sessions: int) -> dict:
+    """Count the rows missing and the ids used twice"""
+    with open(path, newline="") as f:
+        rows = [row for row in csv.reader(f)][1:]
+    expected = {session(writer, number)["start_time"].isoformat(sep=" ", timespec="microseconds")
+                for writer in range(writers) for number in range(sessions)}
+    ids = [row[0] for row in rows]
+    return {"rows": len(rows), "lost": len(expected - {row[2] for row in rows}),
+            "duplicate_ids": len(ids) - len(set(ids))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent writers stress test")
+    parser.add_argument("--writers", type=int, default=8, help="Processes writing at once")
+    parser.add_argument("--sessions", type=int, default=200, help="Sessions saved by every writer")
+    parser.add_argument("--unlocked", action="store_true", help="Append without locking, for comparison")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tracker-writers-")
+    path = os.path.join(workdir, "study_sessions.csv")
+    CSVStorage(path).create()
+
+    barrier = multiprocessing.Barrier(args.writers + 1)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=writer_process,
+                                         args=(path, writer, args.sessions, args.unlocked, barrier, results))
+                 for writer in range(args.writers)]
+    for process in processes:
+        process.start()
+
+    barrier.wait()
+    begin = time.perf_counter()
+    returned_ids = [row_id for _ in processes for row_id in results.get()]
+    elapsed = time.perf_counter() - begin
+    for process in processes:
+        process.join()
+
+    total = args.writers * args.sessions
+    report = check_log(path, args.writers, args.sessions)
+    print(f"{args.writers} writers x {args.sessions} sessions ({'unlocked' if args.unlocked else 'group commit'})")
+    print(f"Time: {elapsed:.2f} s | Throughput: {total / elapsed:,.0f} sessions/s")
+    print(f"Rows in the log: {report['rows']} of {total} | Lost: {report['lost']} | "
+          f"Duplicate ids: {report['duplicate_ids']} | Ids returned twice: {len(returned_ids) - len(set(returned_ids))}")
+
+    if report["lost"] or report["duplicate_ids"] or report["rows"] != total:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Compare parse time and memory of the typed log loader with the original
+_open_log, which let pandas infer every date and duration format, and with
+the memory-mapped snapshot that read_log now goes through.
+
+    python benchmarks/bench_load.py --rows 1000000
+
+Every load starts from a new storage, like a new process would: nothing is
+kept in memory between loads, only the snapshot files on disk.
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+
+from generate_log import write_log
+from snapshot import Snapshot
+from storage import CSVStorage
+
+
+def legacy_open_log(path):
+    """The loader used before the typed representation"""
+    df_log = pd.read_csv(path, index_col=0, parse_dates=["start_time", "end_time"])
+    df_log["total_time"] = pd.to_timedelta(df_log["total_time"])
+    return df_log
+
+
+def typed_open_log(path):
+    """Parse the csv with the typed loader, without the snapshot"""
+    return CSVStorage(path)._read_csv(path)
+
+
+def snapshot_open_log(path):
+    return CSVStorage(path).read_log()
+
+
+def time_sync(path):
+    """Seconds to build the snapshot from scratch and to sync one appended session"""
+    shutil.rmtree(Snapshot.path_for(path), ignore_errors=True)
+    begin = time.perf_counter()
+    CSVStorage(path).read_log()
+    build = time.perf_counter() - begin
+
+    start_time = datetime.now()
+    CSVStorage(path).append({"day": start_time.date(), "start_time": start_time,
+                             "end_time": start_time + timedelta(minutes=45), "total_time": timedelta(minutes=45),
+                             "session": "Morning", "subject": "Thesis"})
+    begin = time.perf_counter()
+    CSVStorage(path).read_log()
+    return build, time.perf_counter() - begin
+
+
+def measure(loader, path, repeat):
+    """Best wall time, peak allocation while parsing and size of the loaded frame"""
+    timings = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        loader(path)
+        timings.append(time.perf_counter() - begin)
+
+    tracemalloc.start()
+    df_log = loader(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, df_log.memory_usage(deep=True).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log loader benchmark")
+    parser.add_argument("--rows", type=int, default=100000, help="Sessions in the synthetic log")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tracker-bench-")
+    try:
+        path = write_log(os.path.join(workdir, "study_sessions.csv"), args.rows)
+
+        build, sync = time_sync(path)
+
+        print(f"{args.rows} rows")
+        print(f"{'loader':<8} {'load s':>8} {'peak MB':>9} {'frame MB':>9}")
+        for name, loader in [("legacy", legacy_open_log), ("typed", typed_open_log), ("snapshot", snapshot_open_log)]:
+            seconds, peak, size = measure(loader, path, args.repeat)
+            print(f"{name:<8} {seconds:>8.4f} {peak / 1e6:>9.1f} {size / 1e6:>9.1f}")
+        print(f"Snapshot build: {build:.3f} s | Sync of one appended session: {sync:.4f} s")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Time how long the CLI takes to answer each command and check that the
+lightweight commands do not import pandas, matplotlib or seaborn.
+
+    python benchmarks/bench_startup.py --repeat 10 --max-ms 150
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+SAMPLE_LOG = os.path.join(ROOT, "Logs", "study_sessions.csv")
+
+HEAVY_MODULES = ("pandas", "matplotlib", "seaborn")
+LIGHT_COMMANDS = {
+    "status": ["status"],
+    "end": ["end"],
+    "abort": ["abort"],
+    "start": ["start", "-s", "Thesis", "-p", "Morning"],
+}
+
+
+def write_session_file(workdir):
+    """Pretend a session was started ten minutes ago"""
+    begin_time = datetime.now() - timedelta(minutes=10)
+    with open(os.path.join(workdir, ".session_active"), "w") as f:
+        f.write(f"Thesis,Morning,{begin_time.isoformat()}")
+
+
+def run_command(workdir, args, importtime=False, log=None):
+    """Run main.py once, return the wall time in ms and the imported heavy modules"""
+    if args[0] in ("end", "abort"):
+        write_session_file(workdir)
+    elif os.path.exists(os.path.join(workdir, ".session_active")):
+        os.remove(os.path.join(workdir, ".session_active"))
+
+    command = ([sys.executable] + (["-X", "importtime"] if importtime else []) + [MAIN]
+               + (["--log", log] if log else []) + args)
+    begin = time.perf_counter()
+    out = subprocess.run(command, cwd=workdir, stdin=subprocess.DEVNULL,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = (time.perf_counter() - begin) * 1000
+
+    # -X importtime prints one line per module to stderr
+    imported = {line.rsplit("|", 1)[-1].strip().split(".")[0] for line in out.stderr.splitlines() if "|" in line}
+    return elapsed, sorted(imported.intersection(HEAVY_MODULES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per command")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Fail if the median of a lightweight command is slower than this")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tracker-bench-")
+    os.makedirs(os.path.join(workdir, "Logs"))
+    shutil.copy(SAMPLE_LOG, os.path.join(workdir, "Logs", "study_sessions.csv"))
+
+    failed = False
+    try:
+        print(f"{'command':<8} {'median ms':>10} {'min ms':>8}  heavy imports")
+        for name, command in LIGHT_COMMANDS.items():
+            timings = [run_command(workdir, command)[0] for _ in range(args.repeat)]
+            _, heavy = run_command(workdir, command, importtime=True)
+            median = statistics.median(timings)
+            print(f"{name:<8} {median:>10.1f} {min(timings):>8.1f}  {', '.join(heavy) or '-'}")
+
+            if heavy or (args.max_ms is not None and median > args.max_ms):
+                failed = True
+    finally:
+        shutil.rmtree(workdir)
+
+    if failed:
+        print("Startup regression: a lightweight command is too slow or imports heavy modules")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
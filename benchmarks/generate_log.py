@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Generate a synthetic study_sessions.csv with realistic days, subjects and periods.
+
+    python benchmarks/generate_log.py --rows 100000 --out /tmp/study_sessions.csv
+
+Large logs are spread over several users studying on the same days, the way a
+consolidated team log looks, so that the dates stay in a realistic range.
+"""
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+from datetime import date, datetime, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage import COLUMNS
+from utils import format_timedelta_log
+
+SUBJECTS = ["Thesis", "Valuation", "PIF", "DIV", "CBEL"]
+SUBJECT_WEIGHTS = [0.3, 0.25, 0.2, 0.15, 0.1]
+ROWS_PER_USER = 5000
+
+
+def period_of(start_time: datetime) -> str:
+    if start_time.hour < 12:
+        return "Morning"
+    if start_time.hour < 18:
+        return "Afternoon"
+    return "Evening"
+
+
+def user_day(rng: random.Random, day: date) -> list:
+    """Sessions of one user on one day as (start, end, subject)"""
+    # Some days off
+    if rng.random() < 0.15:
+        return []
+
+    sessions = []
+    subject = rng.choices(SUBJECTS, SUBJECT_WEIGHTS)[0]
+    clock = datetime.combine(day, time(7)) + timedelta(minutes=rng.randint(0, 180), microseconds=rng.randint(0, 999999))
+    for _ in range(rng.randint(1, 6)):
+        # Around an hour of study, then a break of around twenty minutes
+        length = timedelta(seconds=min(rng.lognormvariate(math.log(3600), 0.5), 4 * 3600), microseconds=rng.randint(0, 999999))
+        end_time = clock + length
+        if end_time.date() != day:
+            break
+        sessions.append((clock, end_time, subject))
+
+        clock = end_time + timedelta(seconds=rng.lognormvariate(math.log(1200), 0.8))
+        if rng.random() < 0.3:
+            subject = rng.choices(SUBJECTS, SUBJECT_WEIGHTS)[0]
+    return sessions
+
+
+def generate_rows(n_rows: int, seed: int = 0, begin: date = date(2020, 1, 1), users: int = None):
+    """Yield log rows in chronological order, id first"""
+    rng = random.Random(seed)
+    users = users or max(1, n_rows // ROWS_PER_USER)
+
+    row_id = 0
+    day = begin
+    while row_id < n_rows:
+        sessions = sorted(session for _ in range(users) for session in user_day(rng, day))
+        for start_time, end_time, subject in sessions:
+            yield [row_id, day.isoformat(),
+                   start_time.isoformat(sep=" ", timespec="microseconds"),
+                   end_time.isoformat(sep=" ", timespec="microseconds"),
+                   format_timedelta_log(end_time - start_time), period_of(start_time), subject]
+            row_id += 1
+            if row_id >= n_rows:
+                return
+        day += timedelta(days=1)
+
+
+def write_log(path: str, n_rows: int, seed: int = 0, users: int = None) -> str:
+    """Write a synthetic log at path and return it"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow([""] + COLUMNS)
+        writer.writerows(generate_rows(n_rows, seed, users=users))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic study sessions log")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of sessions")
+    parser.add_argument("--out", default="./Logs/study_sessions_synthetic.csv", help="Output csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, default=None, help="Users sharing the log, by default one per 5000 rows")
+    args = parser.parse_args()
+
+    write_log(args.out, args.rows, args.seed, args.users)
+    print(f"Wrote {args.rows} sessions to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
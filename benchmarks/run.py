@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Benchmark suite: time the StudyTracker hot paths and the CLI on synthetic logs.
+
+    python benchmarks/run.py --sizes 1000 100000 1000000 --out results.json
+    python benchmarks/run.py --sizes 1000 --compare results.json
+
+Results are written as json, one entry per (rows, benchmark) with every
+timing in seconds. --compare reports the ratio against a previous run and
+exits with an error if a benchmark got slower than --tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Plots are rendered without a display, also in the CLI subprocesses
+os.environ["MPLBACKEND"] = "Agg"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_startup import run_command
+from generate_log import write_log
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+# Every CLI command except the long-running daemon
+CLI_COMMANDS = {
+    "cli status": ["status"],
+    "cli start": ["start", "-s", "Thesis", "-p", "Morning"],
+    "cli end": ["end"],
+    "cli abort": ["abort"],
+    "cli stats": ["stats", "--by", "subject"],
+    "cli stats --today": ["stats", "--today"],
+    "cli plot --sessions": ["plot", "--sessions"],
+    "cli plot --days": ["plot", "--days"],
+    "cli rebuild-rollups": ["rebuild-rollups"],
+    "cli compact": ["compact"],
+}
+
+
+def timeit(function, repeat: int) -> list:
+    """Wall time in seconds of every call, printed output discarded"""
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            begin = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - begin)
+    return timings
+
+
+def tracker_benchmarks(path: str, repeat: int) -> dict:
+    """Time the StudyTracker methods in this process"""
+    import matplotlib.pyplot as plt
+    from study_tracker import StudyTracker
+
+    def cold_open_log():
+        StudyTracker(path)._open_log()
+
+    def save():
+        end_time = datetime.now()
+        start_time = end_time - timedelta(minutes=45)
+        tracker.save({"day": start_time.date(), "start_time": start_time, "end_time": end_time,
+                      "total_time": end_time - start_time, "session": "Morning", "subject": "Thesis"})
+
+    def save_and_flush():
+        # save only queues the row, this includes the write itself
+        save()
+        tracker.flush()
+
+    def plot_days_total():
+        tracker.plot_days_total()
+        plt.close("all")
+
+    tracker = StudyTracker(path)
+    tracker.resume_session("Thesis", "Morning", datetime.now() - timedelta(minutes=45))
+    tracker.end_time = datetime.now()
+
+    return {
+        "StudyTracker.__init__": timeit(lambda: StudyTracker(path), repeat),
+        "_open_log cold": timeit(cold_open_log, repeat),
+        "rebuild_rollups": timeit(tracker.rebuild_rollups, repeat),
+        "save": timeit(save, repeat),
+        "save + flush": timeit(save_and_flush, repeat),
+        "_today_stats": timeit(tracker._today_stats, repeat),
+        "display_time_by": timeit(tracker.display_time_by, repeat),
+        "plot_days_total": timeit(plot_days_total, repeat),
+    }
+
+
+def cli_benchmarks(workdir: str, path: str, repeat: int) -> dict:
+    """Time one CLI process per command"""
+    return {name: [run_command(workdir, command, log=path)[0] / 1000 for _ in range(repeat)]
+            for name, command in CLI_COMMANDS.items()}
+
+
+# Slowdowns smaller than this are timer noise, not regressions
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def compare(results: list, previous_path: str, tolerance: float) -> bool:
+    """Print the ratio of every best time against a previous run, False on regressions"""
+    with open(previous_path) as f:
+        previous = {(entry["rows"], entry["name"]): entry["best"] for entry in json.load(f)["results"]}
+
+    ok = True
+    print(f"\n{'rows':>9} {'benchmark':<24} {'before s':>10} {'now s':>10} {'ratio':>7}")
+    for entry in results:
+        before = previous.get((entry["rows"], entry["name"]))
+        if before is None:
+            continue
+        ratio = entry["best"] / before if before > 0 else float("inf")
+        slower = ratio > 1 + tolerance and entry["best"] - before > MIN_REGRESSION_SECONDS
+        flag = "  SLOWER" if slower else ""
+        ok = ok and not flag
+        print(f"{entry['rows']:>9} {entry['name']:<24} {before:>10.4f} {entry['best']:>10.4f} {ratio:>7.2f}{flag}")
+    return ok
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StudyTracker benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Rows of the synthetic logs")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark")
+    parser.add_argument("--out", default=None, help="Json file for the results")
+    parser.add_argument("--data-dir", default=None, help="Keep the generated logs here and reuse them")
+    parser.add_argument("--no-cli", action="store_true", help="Skip the CLI benchmarks")
+    parser.add_argument("--compare", default=None, help="Json results of a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown with --compare")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tracker-bench-")
+    data_dir = args.data_dir or os.path.join(workdir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+
+    results = []
+    try:
+        for rows in args.sizes:
+            # The benchmarks append to the log, so they run on a copy
+            source = os.path.join(data_dir, f"study_sessions_{rows}.csv")
+            if not os.path.exists(source):
+                write_log(source, rows)
+            path = os.path.join(workdir, "study_sessions.csv")
+            shutil.copy(source, path)
+            rollups_path = os.path.splitext(path)[0] + ".rollups.json"
+            if os.path.exists(rollups_path):
+                os.remove(rollups_path)
+
+            timings = tracker_benchmarks(path, args.repeat)
+            if not args.no_cli:
+                timings.update(cli_benchmarks(workdir, path, args.repeat))
+
+            for name, seconds in timings.items():
+                results.append({"rows": rows, "name": name, "seconds": seconds,
+                                "best": min(seconds), "median": statistics.median(seconds)})
+                print(f"{rows:>9} {name:<24} best {min(seconds):>9.4f} s  median {statistics.median(seconds):>9.4f} s")
+    finally:
+        shutil.rmtree(workdir)
+
+    if args.out:
+        import pandas as pd
+
+        meta = {"date": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+                "python": platform.python_version(), "pandas": pd.__version__, "platform": platform.platform(),
+                "repeat": args.repeat}
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Results saved at: {args.out}")
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Optional background process owning the active session and the cached log.
+
+Clients talk to it over a Unix domain socket, one json request per line and
+one json response per line, e.g.
+
+    {"command": "start", "subject": "Thesis", "period": "Morning", "log": "/abs/path.csv"}
+    {"ok": true, "message": "Study session started at 09:00:00\\n"}
+
+The client side, in daemon_client.py, only needs the standard library, the
+daemon keeps pandas and the parsed log loaded between commands.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import signal
+
+from daemon_client import SOCKET_PATH
+from utils import SESSION_FILE, read_session_file, write_session_file
+
+COMMANDS = ("start", "end", "abort", "status", "stats", "shutdown")
+
+
+class SessionDaemon:
+    """Serve the session commands of one log over a Unix socket"""
+
+    def __init__(self, log_path: str, socket_path: str = SOCKET_PATH) -> None:
+        from study_tracker import StudyTracker
+
+        self.log_path = os.path.abspath(log_path)
+        self.socket_path = socket_path
+        self.tracker = StudyTracker(log_path)
+        self.stopped = None
+        self.loop = None
+        # Commands run one at a time in a worker thread, the loop keeps accepting clients
+        self.busy = None
+        # Requests being answered, stopping waits for them
+        self.clients = set()
+
+        # Take over a session started before the daemon
+        if os.path.exists(SESSION_FILE):
+            session_info = read_session_file(SESSION_FILE)
+            if session_info is not None:
+                self.tracker.resume_session(*session_info)
+
+    def handle(self, request: dict) -> dict:
+        """Run one command, the printed output of the tracker becomes the message"""
+        if not isinstance(request, dict):
+            return {"ok": False, "message": "Malformed request\n"}
+        command = request.get("command")
+        if command not in COMMANDS:
+            return {"ok": False, "message": f"Unknown command: {command}\n"}
+
+        # Requests for another log are left to the client
+        if request.get("log") not in (None, self.log_path):
+            return {"ok": False, "unsupported": True, "message": f"Daemon serves {self.log_path}\n"}
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            try:
+                getattr(self, f"_{command}")(request)
+            except (ValueError, AssertionError) as e:
+                print(f"Error: {e}")
+                return {"ok": False, "message": output.getvalue()}
+            except Exception as e:
+                # Any answer beats a dropped connection, the client would run the command again
+                print(f"Error: {command} failed: {e!r}")
+                return {"ok": False, "message": output.getvalue()}
+        return {"ok": True, "message": output.getvalue()}
+
+    def _start(self, request):
+        if self.tracker.is_studying:
+            print(f"A session is already active for subject '{self.tracker.subject}' ({self.tracker.session}).")
+            print("End or abort it before starting a new one.")
+            return
+        self.tracker.start_session(subject=request.get("subject"), session=request.get("period"), show_timer=False)
+        write_session_file(self.tracker.subject, self.tracker.session, self.tracker.start_time)
+
+    def _end(self, request):
+        if not self.tracker.is_studying:
+            print("No active study session found.")
+            return
+        subject, session, start_time = self.tracker.subject, self.tracker.session, self.tracker.start_time
+        self.tracker.end_session()
+        try:
+            self.tracker.flush()
+        except Exception as e:
+            # Not in the log: the session stays active, here and in the marker file, to end it again
+            self.tracker.resume_session(subject, session, start_time)
+            raise ValueError(f"the session could not be saved: {e}") from e
+        self._remove_session_file()
+
+    def _abort(self, request):
+        if not self.tracker.is_studying:
+            print("No active study session found.")
+            return
+        self.tracker.abort_session()
+        self._remove_session_file()
+
+    def _status(self, request):
+        from datetime import datetime
+
+        if not self.tracker.is_studying:
+            print("No active study session.")
+            return
+        elapsed = datetime.now() - self.tracker.start_time
+        hours, remainder = divmod(int(elapsed.total_seconds()), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        print(f"Active session: {self.tracker.subject} ({self.tracker.session})")
+        print(f"Started at: {self.tracker.start_time.strftime('%H:%M:%S')}")
+        print(f"Elapsed time: {hours:02}:{minutes:02}:{seconds:02}")
+
+    def _stats(self, request):
+        if request.get("today"):
+            self.tracker.display_today()
+        elif request.get("efficiency"):
+            self.tracker.display_efficiency(since=request.get("since"), until=request.get("until"))
+        elif request.get("since") is not None or request.get("until") is not None:
+            print(f"Sessions from {request.get('since') or 'the start'} to {request.get('until') or 'today'}:")
+            self.tracker.display_time_by(by=request.get("by", "subject"), since=request.get("since"),
+                                         until=request.get("until"))
+        else:
+            self.tracker.display_time_by(by=request.get("by", "subject"), chunksize=request.get("chunksize"))
+
+    def _shutdown(self, request):
+        print("Daemon stopped.")
+        # Called from the worker thread
+        self.loop.call_soon_threadsafe(self.stopped.set)
+
+    def _remove_session_file(self):
+        if os.path.exists(SESSION_FILE):
+            os.remove(SESSION_FILE)
+
+    async def _client(self, reader, writer):
+        self.clients.add(asyncio.current_task())
+        try:
+            await self._answer(reader, writer)
+        finally:
+            self.clients.discard(asyncio.current_task())
+
+    async def _answer(self, reader, writer):
+        line = await reader.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {"ok": False, "message": "Malformed request\n"}
+        else:
+            try:
+                async with self.busy:
+                    response = await self.loop.run_in_executor(None, self.handle, request)
+            except Exception as e:
+                response = {"ok": False, "message": f"Error: {e!r}\n"}
+        try:
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            # The client gave up waiting
+            pass
+        writer.close()
+
+    async def serve(self):
+        """Answer requests until a shutdown command or SIGTERM/SIGINT"""
+        self.stopped = asyncio.Event()
+        self.busy = asyncio.Lock()
+        self.loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            self.loop.add_signal_handler(sig, self.stopped.set)
+
+        # Left over by a daemon that was killed
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        server = await asyncio.start_unix_server(self._client, path=self.socket_path)
+        print(f"Daemon listening on {self.socket_path} for {self.log_path}")
+        try:
+            async with server:
+                await self.stopped.wait()
+                # A command still running must answer, or its client runs it again
+                server.close()
+                await asyncio.gather(*self.clients, return_exceptions=True)
+        finally:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+        # The session stays in the marker file, the CLI can still end it
+        if self.tracker.is_studying:
+            print("Session still active, end it with the CLI.")
+
+
+def run_daemon(log_path: str, socket_path: str = SOCKET_PATH):
+    asyncio.run(SessionDaemon(log_path, socket_path).serve())
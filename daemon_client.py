@@ -0,0 +1,26 @@
+"""Client side of the session daemon, only the standard library so that every
+CLI run can look for a daemon without paying for asyncio or pandas."""
+import json
+import socket
+
+SOCKET_PATH = "./.tracker.sock"
+
+
+def send_command(request: dict, socket_path: str = SOCKET_PATH, timeout: float = 5.0):
+    """Send a request to the daemon, None if no daemon is listening.
+    A daemon that fails to answer gives an error response, the command may
+    still run there, so the client must not run it again itself"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with client.makefile("rb") as reader:
+                line = reader.readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    except TimeoutError:
+        return {"ok": False, "message": f"Error: the daemon on {socket_path} did not answer within {timeout:g}s\n"}
+    except OSError as e:
+        return {"ok": False, "message": f"Error: could not talk to the daemon on {socket_path}: {e}\n"}
+    return json.loads(line) if line else None
@@ -0,0 +1,117 @@
+import bisect
+import json
+import os
+import zlib
+
+from utils import prefix_checksum
+
+
+class DayIndex:
+    """Byte offset of the first row of every day of a csv log.
+
+    A date range is read by seeking straight to its first row instead of
+    parsing the whole history. The log is only appended to, so the index is
+    extended from the size it was built for. As for the snapshot, a log whose
+    signature is head was only appended to by the tracker, any other change
+    is checked against the checksum of every indexed byte.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.size = 0
+        # crc32 of the first size bytes of the log
+        self.checksum = 0
+        # Signature of the log when indexed, and after the appends made since
+        self.signature = None
+        self.head = None
+        self.days = []
+        self.offsets = []
+        # False if a day ever goes back in time, offsets are useless then
+        self.chronological = True
+
+    @staticmethod
+    def path_for(log_path: str) -> str:
+        """Index of Logs/study_sessions.csv lives in Logs/study_sessions.days.json"""
+        return os.path.splitext(log_path)[0] + ".days.json"
+
+    def load(self) -> bool:
+        """Read the index from disk, False if it is missing or unreadable"""
+        try:
+            with open(self.path) as f:
+                content = json.load(f)
+            self.size = content["size"]
+            self.checksum = content["checksum"]
+            self.signature = tuple(content["signature"]) if content["signature"] is not None else None
+            self.head = tuple(content["head"]) if content["head"] is not None else None
+            self.days = content["days"]
+            self.offsets = content["offsets"]
+            self.chronological = content["chronological"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.reset()
+            return False
+        return True
+
+    def save(self):
+        """Write the index, replacing the file atomically"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"size": self.size, "checksum": self.checksum, "signature": self.signature,
+                       "head": self.head, "days": self.days, "offsets": self.offsets,
+                       "chronological": self.chronological}, f)
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        """Forget every indexed row, the next refresh reads the whole log"""
+        self.size, self.checksum, self.signature, self.head = 0, 0, None, None
+        self.days, self.offsets, self.chronological = [], [], True
+
+    def appended(self, signature: tuple, new_signature: tuple):
+        """Record an append by the tracker that changed the log from signature to new_signature"""
+        if self.head == tuple(signature):
+            self.head = tuple(new_signature)
+
+    def refresh(self, log_path: str, signature: tuple) -> bool:
+        """Index the rows appended since the last refresh, signature being the one of the log.
+        True if the index changed"""
+        signature = tuple(signature)
+        if signature == self.signature:
+            return False
+        # Appends of the tracker keep the indexed bytes, any other change is checked
+        if signature != self.head and prefix_checksum(log_path, self.size) != self.checksum:
+            self.reset()
+
+        with open(log_path, "rb") as f:
+            f.seek(self.size)
+            # Skip the header
+            if self.size == 0:
+                self.checksum = zlib.crc32(f.readline())
+            offset = f.tell()
+
+            for line in f:
+                # A row written right now, or by an editor leaving out the last newline:
+                # it stays after the indexed size, where every read checks its day
+                if not line.endswith(b"\n"):
+                    break
+                fields = line.split(b",", 2)
+                # Blank lines, e.g. the newline added before the next row
+                if len(fields) >= 2:
+                    day = fields[1].decode("utf-8")
+                    if not self.days or day != self.days[-1]:
+                        if self.days and day < self.days[-1]:
+                            self.chronological = False
+                        self.days.append(day)
+                        self.offsets.append(offset)
+                offset += len(line)
+                self.checksum = zlib.crc32(line, self.checksum)
+
+        self.size = offset
+        self.signature = self.head = signature
+        return True
+
+    def byte_range(self, since: str = None, until: str = None) -> tuple:
+        """Offsets of the first row of since and of the first row after until, None for the end of the log"""
+        first = bisect.bisect_left(self.days, since) if since is not None else 0
+        last = bisect.bisect_right(self.days, until) if until is not None else len(self.days)
+        start = self.offsets[first] if first < len(self.days) else self.size
+        end = self.offsets[last] if last < len(self.days) else None
+        return start, end
@@ -0,0 +1,129 @@
+"""Bulk import of sessions tracked elsewhere, from csv or jsonl files.
+
+Every check runs on whole columns: subjects and periods, sessions ending
+before they start, overlaps between the imported sessions and with the ones
+already logged. Sessions identical to a logged one are skipped, so importing
+the same file twice is harmless.
+"""
+import os
+
+# Columns an import file needs, "period" is accepted for "session" like in the CLI
+IMPORT_COLUMNS = ["start_time", "end_time", "subject", "session"]
+MAX_REPORTED_ERRORS = 10
+# A UTC offset at the end of an ISO 8601 time, e.g. Z or +02:00
+UTC_OFFSET = r"(?:Z|[+-]\d{2}:?\d{2})$"
+
+
+def read_sessions(path: str) -> "pd.DataFrame":
+    """Read an import file into start_time, end_time, subject and session columns,
+    plus the row number in the file for the error messages"""
+    import numpy as np
+    import pandas as pd
+
+    if os.path.splitext(path)[1].lower() in (".jsonl", ".json", ".ndjson"):
+        raw = pd.read_json(path, lines=True, dtype=False, convert_dates=False)
+    else:
+        raw = pd.read_csv(path, dtype=str)
+    raw = raw.rename(columns={"period": "session"})
+
+    missing = [column for column in IMPORT_COLUMNS if column not in raw.columns]
+    if missing:
+        raise ValueError(f"{path} has no {missing} columns. Please provide: {IMPORT_COLUMNS}")
+
+    df_new = pd.DataFrame({
+        "row": np.arange(1, len(raw) + 1),
+        "start_time": parse_times(raw["start_time"]),
+        "end_time": parse_times(raw["end_time"]),
+        "subject": raw["subject"].astype(str).str.strip(),
+        "session": raw["session"].astype(str).str.strip(),
+    })
+    df_new["day"] = df_new["start_time"].dt.strftime("%Y-%m-%d")
+    df_new["total_time"] = df_new["end_time"] - df_new["start_time"]
+    return df_new
+
+
+def parse_times(values: "pd.Series") -> "pd.Series":
+    """Parse ISO 8601 times as the local times the tracker logs: times with a UTC offset
+    are converted to local time. Unparseable ones become NaT, reported by validate_sessions"""
+    import pandas as pd
+
+    values = values.astype(str).str.strip()
+    aware = values.str.contains(UTC_OFFSET, na=False).to_numpy()
+    parsed = pd.to_datetime(values.where(~aware), format="ISO8601", errors="coerce").astype("datetime64[ns]")
+
+    if aware.any():
+        utc = pd.to_datetime(values[aware], format="ISO8601", errors="coerce", utc=True)
+        # astimezone picks the local offset of every date, daylight saving time included
+        parsed[aware] = utc.map(lambda time: time.to_pydatetime().astimezone().replace(tzinfo=None)
+                                if not pd.isna(time) else pd.NaT).astype("datetime64[ns]")
+    return parsed
+
+
+def validate_sessions(df_new: "pd.DataFrame", valid_subjects: list, valid_sessions: list) -> tuple:
+    """Problems of the imported sessions on their own: the first ones as (row, message)
+    sorted by row, and how many there are in total"""
+    checks = [
+        (df_new["start_time"].isna(), lambda row: "start_time is not a date"),
+        (df_new["end_time"].isna(), lambda row: "end_time is not a date"),
+        (df_new["end_time"] <= df_new["start_time"], lambda row: "ends before it starts"),
+        (~df_new["subject"].isin(valid_subjects),
+         lambda row: f"{row.subject} is not a valid subject. Please choose from: {valid_subjects}"),
+        (~df_new["session"].isin(valid_sessions),
+         lambda row: f"{row.session} is not a valid session. Please choose from: {valid_sessions}"),
+    ]
+
+    errors, total = [], 0
+    for mask, message in checks:
+        total += int(mask.sum())
+        # Only the reported rows are formatted
+        for row in df_new[mask.to_numpy()].head(MAX_REPORTED_ERRORS).itertuples():
+            errors.append((row.row, message(row)))
+    return sorted(errors), total
+
+
+def drop_logged(df_new: "pd.DataFrame", df_log: "pd.DataFrame") -> tuple:
+    """Remove the sessions repeated in the file or already in the log, return them and the number dropped"""
+    keys = ["start_time", "end_time", "subject", "session"]
+    unique = df_new.drop_duplicates(keys)
+
+    logged = df_log[keys].astype({"subject": str, "session": str}).drop_duplicates()
+    merged = unique.merge(logged, on=keys, how="left", indicator=True)
+    fresh = merged[(merged["_merge"] == "left_only").to_numpy()].drop(columns="_merge")
+    return fresh.reset_index(drop=True), len(df_new) - len(fresh)
+
+
+def find_overlaps(df_new: "pd.DataFrame", df_log: "pd.DataFrame") -> tuple:
+    """Imported sessions overlapping each other or a logged one, like validate_sessions"""
+    import numpy as np
+
+    df_new = df_new.sort_values("start_time", kind="stable")
+    starts = df_new["start_time"].to_numpy()
+    ends = df_new["end_time"].to_numpy()
+
+    # Overlapping an earlier imported session: starting before the latest end so far
+    within = np.zeros(len(df_new), dtype=bool)
+    if len(df_new):
+        within[1:] = starts[1:] < np.maximum.accumulate(ends)[:-1]
+
+    # Overlapping a logged session: one of those starting before our end ends after our start
+    df_log = df_log.sort_values("start_time", kind="stable")
+    log_starts = df_log["start_time"].to_numpy()
+    log_latest_end = np.maximum.accumulate(df_log["end_time"].to_numpy()) if len(df_log) else log_starts
+    before = np.searchsorted(log_starts, ends, side="left")
+    logged = np.zeros(len(df_new), dtype=bool)
+    has_before = before > 0
+    logged[has_before] = log_latest_end[before[has_before] - 1] > starts[has_before]
+
+    errors = [(row, "overlaps another imported session")
+              for row in df_new["row"].to_numpy()[within][:MAX_REPORTED_ERRORS]]
+    errors += [(row, "overlaps a session already in the log")
+               for row in df_new["row"].to_numpy()[logged][:MAX_REPORTED_ERRORS]]
+    return sorted(errors), int(within.sum() + logged.sum())
+
+
+def format_errors(errors: list, total: int) -> str:
+    """One line per reported problem, with the count of the unreported ones"""
+    lines = [f"Row {row}: {message}" for row, message in errors[:MAX_REPORTED_ERRORS]]
+    if total > len(lines):
+        lines.append(f"... and {total - len(lines)} more")
+    return "\n".join(lines)
@@ -1,45 +1,111 @@
 #!/usr/bin/env python3
+import time
+_import_start = time.perf_counter()
+
 import argparse
+import json
 import sys
-import time
 import signal
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import os
-import pandas as pd
 import threading
 
-# Import the Logger class from the provided file
+# Import the Logger class from the provided file, it only loads pandas,
+# matplotlib and seaborn for stats and plots
 from study_tracker import StudyTracker
-from utils import format_timedelta_hms
+from storage import DEFAULT_LOG_PATH, open_storage, migrate_csv_to_sqlite
+from daemon_client import SOCKET_PATH, send_command
+from aggregate import MULTI_LOG_CACHE, aggregate_logs, expand_logs
+from utils import SESSION_FILE, format_timedelta_hms, read_session_file, write_session_file
+from plotting import DEFAULT_MAX_POINTS
+from report import build_reports
+import profiling
+from profiling import span
+
+_import_seconds = time.perf_counter() - _import_start
 
 # Global variables to track state
 study_logger = None
 session_active = False
 exit_app = False
+session_done = threading.Event()
 
-def setup_environment():
+def setup_environment(path=DEFAULT_LOG_PATH):
     """Set up the necessary directory structure and files"""
-    # Create logs directory if it doesn't exist
-    if not os.path.exists("./logs"):
-        os.makedirs("./logs")
-    
-    # Create study_sessions.csv if it doesn't exist
-    if not os.path.exists("./logs/study_sessions.csv"):
-        # Create an empty DataFrame with the required columns
-        df = pd.DataFrame(columns=["day", "start_time", "end_time", "total_time", "session", "subject"])
-        df.to_csv("./logs/study_sessions.csv", index=True)
+    # Create the log and its directory if they don't exist
+    if open_storage(path).create():
         print("Created new study sessions log file.")
 
+def forward_to_daemon(args):
+    """Run the command in the session daemon, False if no daemon serves this log"""
+    if args.command == "stats" and args.logs:
+        return False
+    
+    request = {"command": args.command, "log": os.path.abspath(args.log)}
+    if args.command == "start":
+        request.update(subject=args.subject, period=args.period)
+    elif args.command == "stats":
+        since, until = stats_range(args)
+        request.update(today=args.today, by=args.by, chunksize=args.chunksize, since=since, until=until,
+                       efficiency=args.efficiency)
+
+    response = send_command(request, args.socket)
+    if response is None or response.get("unsupported"):
+        return False
+
+    print(response["message"], end="")
+    return True
+
+def parse_month(text):
+    """First day of a YYYY-MM month"""
+    try:
+        return datetime.strptime(text, "%Y-%m").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid month: '{text}', expected YYYY-MM")
+
+def stats_range(args):
+    """Days from and to of the stats command as YYYY-MM-DD, None where open"""
+    since, until = None, None
+    if args.last_week:
+        until = date.today()
+        since = until - timedelta(days=6)
+    elif args.month:
+        since = args.month
+        until = (since.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+    # Explicit bounds win over the shortcuts
+    since = args.since or since
+    until = args.until or until
+    return (since.isoformat() if since else None, until.isoformat() if until else None)
+
+def ended_elsewhere():
+    """True if `end` or `abort` from another process already took the session of this one,
+    its marker is then gone or names another session"""
+    if not os.path.exists(SESSION_FILE):
+        return True
+    session_info = read_session_file(SESSION_FILE)
+    return session_info is not None and session_info[2] != study_logger.start_time
+
+def end_own_session():
+    """End the session of this process, unless another process did it already"""
+    if ended_elsewhere():
+        study_logger.release_session()
+        print("\nSession already ended by another process, not saved again.")
+    else:
+        study_logger.end_session()
+
 def signal_handler(sig, frame):
     """Handle interrupt signal (Ctrl+C)"""
     global study_logger, session_active, exit_app
     
     if session_active:
         print("\nEnding study session...")
-        study_logger.end_session()
+        end_own_session()
         session_active = False
     
     exit_app = True
+    if study_logger is not None:
+        study_logger.flush()
     sys.exit(0)
 
 def session_controller():
@@ -55,7 +121,7 @@ def session_controller():
             command = input("> ").strip().lower()
             
             if command == "end":
-                study_logger.end_session()
+                end_own_session()
                 session_active = False
                 break
             elif command == "abort":
@@ -71,22 +137,33 @@ def session_controller():
         except EOFError:
             # Handle EOF (Ctrl+D on Unix)
             print("\nEnding session...")
-            study_logger.end_session()
+            end_own_session()
             session_active = False
             break
+    
+    # Wake up the main thread
+    session_done.set()
 
 def main():
     """Main function to handle CLI arguments and run the appropriate logger functions"""
     global study_logger, session_active, exit_app
     
-    # Set up environment
-    setup_environment()
-    
     # Register signal handler for Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
     
     # Create the main parser
     parser = argparse.ArgumentParser(description="Study Session Logger CLI")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH,
+                        help="Log file, .csv or SQLite (.db/.sqlite)")
+    parser.add_argument("--socket", default=SOCKET_PATH,
+                        help="Unix socket of the session daemon")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time the phases of the command and report them on stderr")
+    parser.add_argument("--profile-format", choices=["text", "json", "cprofile"], default="text",
+                        help="Report the phases as a table, as json, or dump cProfile stats as well")
+    parser.add_argument("--profile-out", default=None,
+                        help="File for the json or cProfile stats, by default json goes to stderr and "
+                             "cProfile to ./tracker.prof")
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
     
     # Start command
@@ -108,20 +185,170 @@ def main():
     stats_parser.add_argument("--today", action="store_true", help="Show today's statistics")
     stats_parser.add_argument("--by", choices=["subject", "session", "day"], default="subject", 
                              help="Group statistics by subject, session, or day period")
+    stats_parser.add_argument("--chunksize", type=int, default=None,
+                             help="Aggregate the whole log streaming it in chunks of this many rows")
+    stats_parser.add_argument("--logs", nargs="+", default=None,
+                             help="Directories, files or glob patterns of many logs to aggregate together")
+    stats_parser.add_argument("--workers", type=int, default=None, help="Processes used with --logs")
+    stats_parser.add_argument("--cache", default=MULTI_LOG_CACHE, help="Per-file totals cache used with --logs")
+    stats_parser.add_argument("--efficiency", action="store_true",
+                             help="Show the pauses and efficiency of every day")
+    stats_parser.add_argument("--since", type=date.fromisoformat, default=None,
+                             help="Only the sessions from this day on (YYYY-MM-DD)")
+    stats_parser.add_argument("--until", type=date.fromisoformat, default=None,
+                             help="Only the sessions up to this day, included (YYYY-MM-DD)")
+    range_group = stats_parser.add_mutually_exclusive_group()
+    range_group.add_argument("--last-week", action="store_true", help="Only the last 7 days, today included")
+    range_group.add_argument("--month", nargs="?", type=parse_month, const=date.today().replace(day=1), default=None, metavar="YYYY-MM",
+                             help="Only one calendar month, the current one if not given")
     
     # Plot command
     plot_parser = subparsers.add_parser("plot", help="Generate plots of study data")
     plot_parser.add_argument("--sessions", action="store_true", help="Plot all study sessions")
     plot_parser.add_argument("--days", action="store_true", help="Plot total study time by day")
+    plot_parser.add_argument("--chunksize", type=int, default=None,
+                             help="Aggregate the whole log streaming it in chunks of this many rows")
+    plot_parser.add_argument("--out", default=None,
+                             help="Render without a display and save the plot to this .png or .svg file")
+    plot_parser.add_argument("--max-points", type=int, default=DEFAULT_MAX_POINTS,
+                             help="Downsample longer series to this many points")
+    
+    # Report command
+    report_parser = subparsers.add_parser("report", help="Save every plot and a summary table to a directory")
+    report_parser.add_argument("--out", required=True, help="Output directory")
+    report_parser.add_argument("--logs", nargs="+", default=None,
+                               help="Directories, files or glob patterns of many logs, one report each")
+    report_parser.add_argument("--workers", type=int, default=None, help="Processes rendering the figures")
+    report_parser.add_argument("--format", choices=["png", "svg"], default="png", help="Image format of the figures")
+    report_parser.add_argument("--max-points", type=int, default=DEFAULT_MAX_POINTS,
+                               help="Downsample longer series to this many points")
+    
+    # Import command
+    import_parser = subparsers.add_parser("import", help="Add the sessions of a csv or jsonl file to the log")
+    import_parser.add_argument("file", help="File with start_time, end_time, subject and session (or period) columns")
+    
+    # Compact command
+    subparsers.add_parser("compact", help="Rewrite the log file renumbering its rows")
+    
+    # Daemon command
+    daemon_parser = subparsers.add_parser("daemon", help="Run the session daemon, commands are then answered by it")
+    daemon_parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    
+    # Rebuild rollups command
+    subparsers.add_parser("rebuild-rollups", help="Recompute the stored totals per day, subject and period")
+    
+    # Migrate command
+    migrate_parser = subparsers.add_parser("migrate", help="Copy a csv log into a new SQLite log")
+    migrate_parser.add_argument("--to", required=True, help="Path of the SQLite log to create")
     
     # Parse arguments
     args = parser.parse_args()
     
+    if not args.profile:
+        run(args, parser)
+    else:
+        profile(args, parser)
+
+def profile(args, parser):
+    """Run the command with timing spans on, then report them"""
+    import cProfile
+    
+    profiling.enable()
+    profiling.record("import cli modules", _import_seconds)
+    
+    profiler = cProfile.Profile() if args.profile_format == "cprofile" else None
+    try:
+        with span(f"command {args.command}"):
+            if profiler is not None:
+                profiler.enable()
+            try:
+                run(args, parser)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        if args.profile_format == "text":
+            profiling.print_report()
+        elif args.profile_format == "json" and args.profile_out:
+            profiling.dump_json(args.profile_out)
+        elif args.profile_format == "json":
+            json.dump({"spans": profiling.spans()}, sys.stderr, indent=2)
+            print(file=sys.stderr)
+        else:
+            stats_path = args.profile_out or "./tracker.prof"
+            profiler.dump_stats(stats_path)
+            profiling.print_report()
+            print(f"cProfile stats saved at: {stats_path}", file=sys.stderr)
+
+def run(args, parser):
+    """Execute the parsed command"""
+    global study_logger, session_active, exit_app
+    
+    # Hand the session commands to the daemon when one is running
+    if args.command in ("start", "end", "abort", "status", "stats"):
+        with span("forward to daemon"):
+            forwarded = forward_to_daemon(args)
+        if forwarded:
+            return
+    
+    # Team-wide stats do not need a log of their own
+    if args.command == "stats" and args.logs:
+        if stats_range(args) != (None, None):
+            print("Date ranges are not supported with --logs.")
+            return
+        paths = expand_logs(args.logs)
+        if not paths:
+            print("No log files found.")
+            return
+        totals, parsed = aggregate_logs(paths, args.workers, args.chunksize or 100_000, args.cache)
+        print(f"{len(paths)} logs, {parsed} parsed, {len(paths) - parsed} cached")
+        print(totals[args.by].apply(format_timedelta_hms))
+        return
+    
+    # Reports load their logs in the worker processes
+    if args.command == "report":
+        if args.logs:
+            paths = expand_logs(args.logs)
+        else:
+            setup_environment(args.log)
+            paths = [args.log]
+        if not paths:
+            print("No log files found.")
+            return
+        try:
+            with span("build reports"):
+                out_dirs = build_reports(paths, args.out, args.workers, args.format, args.max_points)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        for path, out_dir in out_dirs.items():
+            print(f"Report of {path} saved in: {out_dir}")
+        return
+    
+    # Set up environment
+    with span("setup environment"):
+        setup_environment(args.log)
+    
+    if args.command == "daemon":
+        if args.stop:
+            response = send_command({"command": "shutdown"}, args.socket)
+            print(response["message"] if response else "No daemon running.", end="" if response else "\n")
+        else:
+            from daemon import run_daemon
+            run_daemon(args.log, args.socket)
+        return
+    
+    if args.command == "migrate":
+        count = migrate_csv_to_sqlite(args.log, args.to)
+        print(f"Migrated {count} sessions to: {args.to}")
+        return
+    
     # Create logger instance
-    study_logger = StudyTracker()
+    with span("StudyTracker init"):
+        study_logger = StudyTracker(args.log)
     
     # Check for existing session file
-    session_file = "./.session_active"
+    session_file = SESSION_FILE
     
     # Process commands
     if args.command == "start":
@@ -140,20 +367,20 @@ def main():
             session_active = True
             
             # Create session marker file
-            with open(session_file, 'w') as f:
-                f.write(f"{args.subject},{args.period},{datetime.now().isoformat()}")
+            write_session_file(args.subject, args.period, study_logger.start_time, session_file)
             
             # Start thread for session controller
             controller_thread = threading.Thread(target=session_controller)
             controller_thread.daemon = True
             controller_thread.start()
             
-            # Keep the main thread running
-            while session_active and not exit_app:
-                time.sleep(0.5)
+            # Keep the main thread running until the controller is done
+            session_done.wait()
             
-            # Clean up session marker file
-            if os.path.exists(session_file):
+            # Clean up session marker file once the session is in the log,
+            # unless it is already the one of a session started since
+            study_logger.flush()
+            if not ended_elsewhere():
                 os.remove(session_file)
                 
         except ValueError as e:
@@ -161,68 +388,81 @@ def main():
         except AssertionError as e:
             print(f"Error: {e}")
     
-    elif args.command == "end":
+    elif args.command in ("end", "abort"):
         if os.path.exists(session_file):
-            study_logger.end_session()
-            os.remove(session_file)
-        else:
-            print("No active study session found.")
-    
-    elif args.command == "abort":
-        if os.path.exists(session_file):
-            study_logger.abort_session()
+            session_info = read_session_file(session_file)
+            if session_info is not None:
+                # Pick up the session started by the other process
+                study_logger.resume_session(*session_info)
+                if args.command == "end":
+                    study_logger.end_session()
+                else:
+                    study_logger.abort_session()
+                # The marker is kept if the session could not be written
+                study_logger.flush()
+            else:
+                print("Session active but details unavailable.")
             os.remove(session_file)
         else:
             print("No active study session found.")
     
     elif args.command == "status":
         if os.path.exists(session_file):
-            with open(session_file, 'r') as f:
-                session_info = f.read().strip().split(',')
-                if len(session_info) >= 3:
-                    subject, period, start_time = session_info[0], session_info[1], session_info[2]
-                    start_dt = datetime.fromisoformat(start_time)
-                    elapsed = datetime.now() - start_dt
-                    hours, remainder = divmod(int(elapsed.total_seconds()), 3600)
-                    minutes, seconds = divmod(remainder, 60)
-                    
-                    print(f"Active session: {subject} ({period})")
-                    print(f"Started at: {start_dt.strftime('%H:%M:%S')}")
-                    print(f"Elapsed time: {hours:02}:{minutes:02}:{seconds:02}")
-                else:
-                    print("Session active but details unavailable.")
+            session_info = read_session_file(session_file)
+            if session_info is not None:
+                subject, period, start_dt = session_info
+                elapsed = datetime.now() - start_dt
+                hours, remainder = divmod(int(elapsed.total_seconds()), 3600)
+                minutes, seconds = divmod(remainder, 60)
+                
+                print(f"Active session: {subject} ({period})")
+                print(f"Started at: {start_dt.strftime('%H:%M:%S')}")
+                print(f"Elapsed time: {hours:02}:{minutes:02}:{seconds:02}")
+            else:
+                print("Session active but details unavailable.")
         else:
             print("No active study session.")
     
     elif args.command == "stats":
+        since, until = stats_range(args)
         if args.today:
-            today_data, total_time, total_pauses, last_pause = study_logger._today_stats()
-            print(f"\nToday's Statistics:")
-            print(f"Total time studied: {format_timedelta_hms(total_time)}")
-            print(f"Total pauses: {format_timedelta_hms(total_pauses)}")
-            print(f"Last pause duration: {format_timedelta_hms(last_pause)}")
-            if total_time.total_seconds() > 0 and total_pauses.total_seconds() > 0:
-                efficiency = total_time.total_seconds() / (total_time.total_seconds() + total_pauses.total_seconds())
-                print(f"Efficiency: {efficiency:.2f}")
-            print("\nToday's sessions:")
-            if len(today_data) > 0:
-                print(today_data)
-            else:
-                print("No study sessions recorded today.")
+            study_logger.display_today()
+        elif args.efficiency:
+            study_logger.display_efficiency(since=since, until=until)
+        elif since is not None or until is not None:
+            print(f"Sessions from {since or 'the start'} to {until or 'today'}:")
+            study_logger.display_time_by(by=args.by, since=since, until=until)
         else:
-            study_logger.display_time_by(by=args.by)
+            study_logger.display_time_by(by=args.by, chunksize=args.chunksize)
     
     elif args.command == "plot":
-        if args.sessions:
-            study_logger.plot_all_sessions()
-        elif args.days:
-            study_logger.plot_days_total()
-        else:
-            print("Please specify a plot type: --sessions or --days")
+        try:
+            if args.sessions:
+                study_logger.plot_all_sessions(path=args.out, max_points=args.max_points)
+            elif args.days:
+                study_logger.plot_days_total(chunksize=args.chunksize, path=args.out, max_points=args.max_points)
+            else:
+                print("Please specify a plot type: --sessions or --days")
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    elif args.command == "import":
+        try:
+            imported, duplicates = study_logger.import_sessions(args.file)
+            print(f"Imported {imported} sessions, skipped {duplicates} already in the log.")
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    elif args.command == "compact":
+        study_logger.compact_log()
+    
+    elif args.command == "rebuild-rollups":
+        study_logger.rebuild_rollups()
+        print(f"Rollups rebuilt at: {study_logger.rollups_path}")
     
     else:
         parser.print_help()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
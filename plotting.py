@@ -0,0 +1,128 @@
+"""Headless rendering of the tracker plots to png/svg files.
+
+Long histories are downsampled before drawing, and every rendered figure is
+kept in a cache directory next to the log, keyed by the log signature and the
+plot parameters, so an unchanged log is never drawn twice.
+"""
+import glob
+import hashlib
+import json
+import os
+
+# Points drawn at most per series, about the horizontal resolution of a figure
+DEFAULT_MAX_POINTS = 2000
+FORMATS = ("png", "svg")
+# Above this many bars one tick label per bar costs more than the whole plot
+MAX_CATEGORICAL_BARS = 100
+
+
+def plot_format(path: str) -> str:
+    """Image format from the file extension"""
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Cannot save a plot as '{path}'. Please choose from: {['.' + f for f in FORMATS]}")
+    return fmt
+
+
+def minmax_downsample(x, y, max_points: int = DEFAULT_MAX_POINTS) -> tuple:
+    """Keep the smallest and largest y of each of max_points / 2 consecutive buckets.
+
+    Peaks and dips survive, unlike plain striding, and the points stay in x
+    order. Series already short enough are returned unchanged.
+    """
+    import numpy as np
+
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+
+    n_buckets = max(1, max_points // 2)
+    buckets = np.arange(len(y)) * n_buckets // len(y)
+
+    # Sorted by bucket then value: the first of a bucket is its min, the last its max
+    order = np.lexsort((y, buckets))
+    starts = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    keep = np.unique(np.concatenate([order[starts], order[ends]]))
+    return x[keep], y[keep]
+
+
+def sessions_figure(seconds: "pd.Series", max_points: int = DEFAULT_MAX_POINTS) -> dict:
+    """Figure of the length in seconds of every session, indexed by row id"""
+    x, y = minmax_downsample(seconds.index, seconds.to_numpy(), max_points)
+    return {"kind": "line", "x": x, "y": y, "xlabel": "Index", "title": "Time per Session"}
+
+
+def days_figure(seconds: "pd.Series", max_points: int = DEFAULT_MAX_POINTS) -> dict:
+    """Figure of the seconds studied every day, indexed by day"""
+    import pandas as pd
+
+    if len(seconds) <= MAX_CATEGORICAL_BARS:
+        figure = {"kind": "bar", "x": seconds.index.astype(str).to_numpy(), "y": seconds.to_numpy()}
+    else:
+        # Too many days for categorical bars, draw them on a date axis,
+        # only the busiest and quietest of each bucket past max_points
+        x, y = minmax_downsample(pd.to_datetime(seconds.index).to_numpy(), seconds.to_numpy(), max_points)
+        figure = {"kind": "datebar", "x": x, "y": y}
+    return {**figure, "xlabel": "Day", "title": "Total Time Spent Studying"}
+
+
+def draw_figure(ax, figure: dict):
+    """Draw a figure of sessions_figure, days_figure or the report on ax, times on the y-axis"""
+    from matplotlib.ticker import FuncFormatter
+    import seaborn as sns
+    from utils import seconds_to_hms
+
+    if figure["kind"] == "line":
+        # One point per x, nothing for seaborn to estimate
+        sns.lineplot(x=figure["x"], y=figure["y"], ax=ax, estimator=None, errorbar=None)
+    elif figure["kind"] == "bar":
+        sns.barplot(x=figure["x"], y=figure["y"], ax=ax, errorbar=None)
+    else:
+        ax.bar(figure["x"], figure["y"], width=1.0, linewidth=0)
+
+    # Format the y-axis to show time in HH:MM:SS
+    ax.yaxis.set_major_formatter(FuncFormatter(seconds_to_hms))
+    ax.set_xlabel(figure["xlabel"])
+    ax.set_ylabel('Total Time (HH:MM:SS)')
+    ax.set_title(figure["title"])
+
+
+def figure_key(name: str, signature, **params) -> str:
+    """Hash of everything a rendered figure depends on"""
+    content = json.dumps({"name": name, "signature": list(signature), **params}, sort_keys=True, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+class FigureCache:
+    """Rendered figures of one log, one file per plot and format"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    @staticmethod
+    def path_for(log_path: str) -> str:
+        """Figures of Logs/study_sessions.csv live in Logs/study_sessions.plots/"""
+        return os.path.splitext(log_path)[0] + ".plots"
+
+    def _file(self, name: str, key: str, fmt: str) -> str:
+        return os.path.join(self.directory, f"{name}-{key}.{fmt}")
+
+    def get(self, name: str, key: str, fmt: str):
+        """Path of the cached figure, None if it was never rendered"""
+        path = self._file(name, key, fmt)
+        return path if os.path.exists(path) else None
+
+    def put(self, name: str, key: str, fmt: str, figure) -> str:
+        """Save a matplotlib figure, replacing the older versions of the same plot"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._file(name, key, fmt)
+
+        tmp_path = f"{path}.tmp"
+        figure.savefig(tmp_path, format=fmt)
+        os.replace(tmp_path, path)
+
+        for old_path in glob.glob(self._file(name, "*", fmt)):
+            if old_path != path:
+                os.remove(old_path)
+        return path
@@ -0,0 +1,95 @@
+"""Timing spans around the hot paths of the tracker, off unless enabled.
+
+    with span("read_log"):
+        df_log = storage.read_log()
+
+Spans can be nested, the report shows them indented under their parent. When
+profiling is disabled span() returns one shared no-op context manager, so an
+instrumented call only costs a function call.
+"""
+import contextlib
+import json
+import sys
+import time
+
+_enabled = False
+_depth = 0
+# (name, depth, seconds) in the order the spans were opened
+_records = []
+_NO_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ("index",)
+
+    def __init__(self, name: str) -> None:
+        global _depth
+        self.index = len(_records)
+        _records.append([name, _depth, time.perf_counter()])
+        _depth += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        global _depth
+        _depth -= 1
+        record = _records[self.index]
+        record[2] = time.perf_counter() - record[2]
+        return False
+
+
+def span(name: str):
+    """Context manager timing the block it wraps"""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name)
+
+
+def record(name: str, seconds: float, depth: int = 0):
+    """Add a phase timed outside of a span, e.g. the imports before profiling was enabled"""
+    if _enabled:
+        _records.append([name, depth, seconds])
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def spans() -> list:
+    """The finished spans as dicts of name, depth and seconds"""
+    return [{"name": name, "depth": depth, "seconds": seconds} for name, depth, seconds in _records]
+
+
+def print_report(file=sys.stderr):
+    """Print one line per span with its time and share of the top-level total.
+    A span with children ends with the time none of them covers, e.g. a lazy import"""
+    entries = spans()
+    total = sum(entry["seconds"] for entry in entries if entry["depth"] == 0)
+
+    def line(name, depth, seconds):
+        name = "  " * depth + name
+        share = 100 * seconds / total if total > 0 else 0.0
+        print(f"{name:<40} {seconds * 1000:>10.1f} {share:>6.1f}", file=file)
+
+    print(f"\n{'phase':<40} {'ms':>10} {'%':>6}", file=file)
+    # Open parents as [entry, seconds covered by their children, None without children]
+    parents = []
+    for entry in entries + [{"depth": -1}]:
+        while parents and parents[-1][0]["depth"] >= entry["depth"]:
+            parent, covered = parents.pop()
+            if covered is not None:
+                line("(not in a span)", parent["depth"] + 1, max(parent["seconds"] - covered, 0.0))
+        if entry["depth"] < 0:
+            break
+        if parents:
+            parents[-1][1] = (parents[-1][1] or 0.0) + entry["seconds"]
+        line(entry["name"], entry["depth"], entry["seconds"])
+        parents.append([entry, None])
+    print(f"{'total':<40} {total * 1000:>10.1f}", file=file)
+
+
+def dump_json(path: str):
+    with open(path, "w") as f:
+        json.dump({"spans": spans()}, f, indent=2)
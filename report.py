@@ -0,0 +1,110 @@
+"""Batch reports: every figure of one or many logs plus a summary table.
+
+Each log is loaded once and reduced to the small, already downsampled series
+the figures need, then all the figures of all the logs are rendered in the
+same process pool, so a report for a whole team scales with the cores.
+"""
+import os
+
+from plotting import DEFAULT_MAX_POINTS, days_figure, sessions_figure
+
+REPORT_FIGURES = ("sessions", "days", "subjects", "periods")
+
+
+def report_data(path: str, max_points: int = DEFAULT_MAX_POINTS) -> dict:
+    """Load a log and compute the series of every figure and the summary table"""
+    import pandas as pd
+    from study_tracker import StudyTracker
+
+    df_log = StudyTracker(path)._open_log()
+    seconds = df_log["total_time"].dt.total_seconds()
+
+    # The same figures as StudyTracker.plot_all_sessions and plot_days_total
+    figures = {"sessions": {**sessions_figure(seconds, max_points), "figsize": (10, 6)},
+               "days": {**days_figure(seconds.groupby(df_log["day"], observed=True).sum(), max_points),
+                        "figsize": (15, 9)}}
+
+    summary = []
+    for name, column, label in (("subjects", "subject", "Subject"), ("periods", "session", "Period")):
+        grouped = seconds.groupby(df_log[column], observed=True)
+        totals = grouped.sum()
+        figures[name] = {"kind": "bar", "x": totals.index.astype(str).to_numpy(), "y": totals.to_numpy(),
+                         "xlabel": label, "title": f"Total Time by {label}", "figsize": (10, 6)}
+        summary.append(pd.DataFrame({"group": column, "key": totals.index.astype(str), "sessions": grouped.size().to_numpy(),
+                                     "total_seconds": totals.to_numpy()}))
+
+    summary.append(pd.DataFrame({"group": ["all"], "key": ["all"], "sessions": [len(seconds)],
+                                 "total_seconds": [seconds.sum()]}))
+    return {"figures": figures, "summary": pd.concat(summary, ignore_index=True)}
+
+
+def render_figure(spec: dict, path: str) -> str:
+    """Draw one figure of report_data on a bare Figure and save it, run in the workers"""
+    from matplotlib.figure import Figure
+    import seaborn as sns
+    from plotting import draw_figure, plot_format
+
+    sns.set_context("notebook")
+    sns.set_style("darkgrid")
+
+    figure = Figure(figsize=spec["figsize"])
+    draw_figure(figure.add_subplot(), spec)
+    figure.savefig(path, format=plot_format(path))
+    return path
+
+
+def write_summary(summary: "pd.DataFrame", out_dir: str) -> str:
+    """Save the summary table as csv, times as HH:MM:SS"""
+    from utils import seconds_to_hms
+
+    table = summary.assign(total_time=summary["total_seconds"].map(lambda x: seconds_to_hms(x, None)),
+                           share=(summary["total_seconds"] / summary["total_seconds"].iloc[-1]).round(3))
+    path = os.path.join(out_dir, "summary.csv")
+    table.drop(columns="total_seconds").to_csv(path, index=False)
+    return path
+
+
+def report_dirs(paths: list, out_dir: str) -> dict:
+    """Output directory of every log: out_dir for a single log, else the log path relative
+    to the folder all the logs share, e.g. out/alice/study_sessions for team/alice/study_sessions.csv"""
+    if len(paths) == 1:
+        return {paths[0]: out_dir}
+
+    parent = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    out_dirs = {path: os.path.join(out_dir, os.path.splitext(os.path.relpath(os.path.abspath(path), parent))[0])
+                for path in paths}
+
+    # e.g. a.csv and a.db, or the same log given twice
+    by_dir = {}
+    for path, directory in out_dirs.items():
+        by_dir.setdefault(directory, []).append(path)
+    collisions = [logs for logs in by_dir.values() if len(logs) > 1]
+    if collisions:
+        raise ValueError(f"Logs would share a report directory: {collisions}")
+    return out_dirs
+
+
+def build_reports(paths: list, out_dir: str, workers: int = None, fmt: str = "png",
+                  max_points: int = DEFAULT_MAX_POINTS) -> dict:
+    """Write the figures and the summary of every log, each log in its own directory
+    when there are many. Return the output directory of every log."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    out_dirs = report_dirs(paths, out_dir)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Every log is parsed exactly once, in parallel
+        loading = {path: pool.submit(report_data, path, max_points) for path in paths}
+
+        rendering = []
+        for path, future in loading.items():
+            data = future.result()
+            os.makedirs(out_dirs[path], exist_ok=True)
+            write_summary(data["summary"], out_dirs[path])
+            for name in REPORT_FIGURES:
+                figure_path = os.path.join(out_dirs[path], f"{name}.{fmt}")
+                rendering.append(pool.submit(render_figure, data["figures"][name], figure_path))
+
+        for future in rendering:
+            future.result()
+    return out_dirs
@@ -0,0 +1,90 @@
+import json
+import os
+
+from profiling import span
+
+
+# Name of each rollup and the log columns it groups by
+ROLLUP_GROUPS = {"day": "day", "subject": "subject", "session": "session", "subject_day": ["subject", "day"]}
+
+
+class Rollups:
+    """Total study time per day, subject, session and subject x day, in nanoseconds.
+
+    The totals are saved as json next to the log together with the signature
+    of the log they describe, so a log written without updating them is
+    detected and the rollups rebuilt.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.signature = None
+        self.totals = {name: {} for name in ROLLUP_GROUPS}
+
+    @staticmethod
+    def path_for(log_path: str) -> str:
+        """Rollups of Logs/study_sessions.csv live in Logs/study_sessions.rollups.json"""
+        return os.path.splitext(log_path)[0] + ".rollups.json"
+
+    def load(self) -> bool:
+        """Read the rollups from disk, False if they are missing or unreadable"""
+        try:
+            with open(self.path) as f:
+                content = json.load(f)
+            self.signature = tuple(content["signature"])
+            self.totals = {name: content["totals"][name] for name in ROLLUP_GROUPS}
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+    def save(self):
+        """Write the rollups, replacing the file atomically"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"signature": list(self.signature), "totals": self.totals}, f)
+        os.replace(tmp_path, self.path)
+
+    def is_current(self, signature: tuple) -> bool:
+        return self.signature == tuple(signature)
+
+    def add(self, data: dict, signature: tuple):
+        """Add a session just appended to the log"""
+        total = data["total_time"]
+        nanoseconds = ((total.days * 86400 + total.seconds) * 10**6 + total.microseconds) * 1000
+        day, subject, session = str(data["day"]), data["subject"], data["session"]
+
+        for name, key in (("day", day), ("subject", subject), ("session", session)):
+            self.totals[name][key] = self.totals[name].get(key, 0) + nanoseconds
+        by_day = self.totals["subject_day"].setdefault(subject, {})
+        by_day[day] = by_day.get(day, 0) + nanoseconds
+
+        self.signature = tuple(signature)
+
+    def rebuild(self, totals: dict, signature: tuple):
+        """Replace the rollups with freshly aggregated totals, one timedelta Series per rollup"""
+        self.totals = {name: {} for name in ROLLUP_GROUPS}
+        for name, series in totals.items():
+            for key, total in series.items():
+                if name == "subject_day":
+                    self.totals[name].setdefault(str(key[0]), {})[str(key[1])] = int(total.value)
+                else:
+                    self.totals[name][str(key)] = int(total.value)
+        self.signature = tuple(signature)
+
+    def total_by(self, by: str = "subject") -> "pd.Series":
+        """Totals as a timedelta Series sorted by key, like a groupby on the log"""
+        # Timed apart, it is most of a stats answered from the rollups
+        with span("import pandas"):
+            import pandas as pd
+
+        if by not in ROLLUP_GROUPS:
+            raise ValueError(f"Cannot group by {by}. Please choose from: {list(ROLLUP_GROUPS)}")
+
+        if by == "subject_day":
+            items = sorted(((subject, day), total) for subject, days in self.totals[by].items() for day, total in days.items())
+            index = pd.MultiIndex.from_tuples([key for key, _ in items], names=ROLLUP_GROUPS[by])
+        else:
+            items = sorted(self.totals[by].items())
+            index = pd.Index([key for key, _ in items], name=by)
+
+        return pd.Series(pd.to_timedelta([total for _, total in items], unit="ns"), index=index, name="total_time")
@@ -0,0 +1,178 @@
+import io
+import json
+import os
+import zlib
+
+from utils import prefix_checksum
+
+# Binary columns of the snapshot, categories are stored as codes into the meta file
+ARRAY_COLUMNS = {"id": "int64", "start_time": "datetime64[ns]", "end_time": "datetime64[ns]",
+                 "total_time": "timedelta64[ns]"}
+CATEGORY_COLUMNS = ["day", "session", "subject"]
+
+
+class Snapshot:
+    """Columnar binary copy of a csv log, one .npy file per column.
+
+    The csv stays the file people edit; the snapshot is kept in sync by
+    appending the rows written since it was last synced, found from the byte
+    size of the log it was built for. Columns are memory-mapped, so loading
+    the log reads only the pages of the columns used instead of parsing text.
+
+    The tracker moves head to the new signature of the log after every append
+    it makes, so a log whose signature is head was only appended to. Any other
+    change, e.g. an edit by hand, is checked against the checksum of every
+    synced byte.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock_path = os.path.join(path, "lock")
+        self.size = 0
+        self.rows = 0
+        # crc32 of the first size bytes of the log
+        self.checksum = 0
+        # Signature of the log when synced, and after the appends made since
+        self.signature = None
+        self.head = None
+        self.categories = {column: [] for column in CATEGORY_COLUMNS}
+
+    @staticmethod
+    def path_for(log_path: str) -> str:
+        """Snapshot of Logs/study_sessions.csv lives in Logs/study_sessions.snapshot/"""
+        return os.path.splitext(log_path)[0] + ".snapshot"
+
+    def load(self) -> bool:
+        """Read the meta file, False if it is missing or unreadable"""
+        try:
+            with open(os.path.join(self.path, "meta.json")) as f:
+                content = json.load(f)
+            self.size = content["size"]
+            self.rows = content["rows"]
+            self.checksum = content["checksum"]
+            self.signature = tuple(content["signature"]) if content["signature"] is not None else None
+            self.head = tuple(content["head"]) if content["head"] is not None else None
+            self.categories = {column: content["categories"][column] for column in CATEGORY_COLUMNS}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return False
+        return True
+
+    def save(self):
+        """Write the meta file last, replacing it atomically"""
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"size": self.size, "rows": self.rows, "checksum": self.checksum,
+                       "signature": self.signature, "head": self.head, "categories": self.categories}, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def reset(self):
+        """Forget every synced row, the next sync rebuilds the columns"""
+        self.size, self.rows, self.checksum = 0, 0, 0
+        self.signature = self.head = None
+        self.categories = {column: [] for column in CATEGORY_COLUMNS}
+
+    def matches(self, log_path: str) -> bool:
+        """Check that the log still starts with the synced bytes, i.e. it was only appended to"""
+        return prefix_checksum(log_path, self.size) == self.checksum
+
+    def appended(self, signature: tuple, new_signature: tuple):
+        """Record an append by the tracker that changed the log from signature to new_signature"""
+        if self.head == tuple(signature):
+            self.head = tuple(new_signature)
+
+    def append(self, df_new: "pd.DataFrame", content: bytes, signature: tuple):
+        """Add the rows parsed from content, the bytes of the log after the synced ones,
+        signature being the one of the log they were read from"""
+        import numpy as np
+        import pandas as pd
+
+        rebuild = self.rows == 0
+        columns = {"id": df_new.index.to_numpy(dtype="int64")}
+        for column in ARRAY_COLUMNS:
+            if column != "id":
+                columns[column] = df_new[column].to_numpy(dtype=ARRAY_COLUMNS[column])
+
+        # New categories go after the known ones, the codes already written stay valid
+        for column in CATEGORY_COLUMNS:
+            values = df_new[column].astype(str)
+            known = self.categories[column]
+            seen = set(known)
+            known += [value for value in pd.unique(values) if value not in seen]
+            columns[column] = pd.Categorical(values, categories=known).codes.astype("int32")
+
+        for column, values in columns.items():
+            path = self._column_path(column)
+            if rebuild or not _append_npy(path, values, self.rows):
+                tmp_path = f"{path}.tmp.npy"
+                np.save(tmp_path, values if rebuild else np.concatenate([self.column(column), values]))
+                os.replace(tmp_path, path)
+
+        self.rows += len(df_new)
+        self.size += len(content)
+        self.checksum = zlib.crc32(content, self.checksum)
+        self.signature = self.head = tuple(signature)
+
+    def column(self, column: str) -> "np.ndarray":
+        """A synced column, memory-mapped copy on write: changing it never touches the file"""
+        import numpy as np
+
+        if self.rows == 0:
+            return np.empty(0, dtype=ARRAY_COLUMNS.get(column, "int32"))
+        # The file may be ahead of the meta after an interrupted sync
+        return np.load(self._column_path(column), mmap_mode="c")[:self.rows]
+
+    def frame(self, columns: list = None) -> "pd.DataFrame":
+        """The synced log as read_log returns it, only the requested columns are mapped"""
+        import pandas as pd
+
+        data = {}
+        for column in columns if columns is not None else list(ARRAY_COLUMNS)[1:] + CATEGORY_COLUMNS:
+            if column in CATEGORY_COLUMNS:
+                categories = self.categories[column]
+                values = pd.Categorical.from_codes(self.column(column), categories)
+                # Same category order as pandas gives the csv, so groupby sorts alike
+                if categories != sorted(categories):
+                    values = values.reorder_categories(sorted(categories))
+                data[column] = values
+            else:
+                data[column] = self.column(column)
+
+        order = [column for column in ["day", "start_time", "end_time", "total_time", "session", "subject"] if column in data]
+        return pd.DataFrame({column: data[column] for column in order},
+                            index=pd.Index(self.column("id"), copy=False), copy=False)
+
+    def _column_path(self, column: str) -> str:
+        return os.path.join(self.path, f"{column}.npy")
+
+
+def _append_npy(path: str, values: "np.ndarray", rows: int) -> bool:
+    """Append values after the first rows of a 1d .npy file, rewriting its shape in place.
+    False if the file does not fit, the caller then writes it again"""
+    import numpy as np
+
+    try:
+        with open(path, "r+b") as f:
+            version = np.lib.format.read_magic(f)
+            if version != (1, 0):
+                return False
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            offset = f.tell()
+            if dtype != values.dtype or len(shape) != 1 or shape[0] < rows:
+                return False
+
+            # numpy leaves room in the header for the length to grow
+            header = io.BytesIO()
+            np.lib.format.write_array_header_1_0(
+                header, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False,
+                         "shape": (rows + len(values),)})
+            if len(header.getvalue()) != offset:
+                return False
+
+            f.seek(offset + rows * dtype.itemsize)
+            f.write(values.tobytes())
+            f.truncate()
+            f.seek(0)
+            f.write(header.getvalue())
+    except (OSError, ValueError):
+        return False
+    return True
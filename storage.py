@@ -0,0 +1,642 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from utils import (append_csv_rows, file_lock, shared_file_lock, iter_lines_reversed, read_last_line,
+                   format_timedelta_log, parse_timedelta_log)
+from day_index import DayIndex
+from snapshot import Snapshot
+
+# pandas is imported inside the methods that build DataFrames, appending a
+# session and reading a single day only need the standard library
+
+
+DEFAULT_LOG_PATH = "./Logs/study_sessions.csv"
+COLUMNS = ["day", "start_time", "end_time", "total_time", "session", "subject"]
+GROUP_COLUMNS = ["day", "subject", "session"]
+
+# Formats written by the log, parsed explicitly instead of inferred row by row
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+CSV_DTYPES = {"day": "category", "start_time": str, "end_time": str,
+              "total_time": str, "session": "category", "subject": "category"}
+
+
+class LogStorage:
+    """Interface shared by the session log backends"""
+
+    # True when filtering and aggregation are cheap to run on the backend
+    queries_in_sql = False
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # Held by every tracker process writing the log
+        self.lock_path = os.path.splitext(path)[0] + ".lock"
+        # Thread of this process holding it, see _read_lock
+        self._lock_owner = None
+
+    def signature(self) -> tuple:
+        """Fingerprint of the log on disk, it changes whenever the log is written"""
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @contextlib.contextmanager
+    def _write_lock(self):
+        """Hold the log lock to write, one writer at a time across processes"""
+        with file_lock(self.lock_path):
+            self._lock_owner = threading.get_ident()
+            try:
+                yield
+            finally:
+                self._lock_owner = None
+
+    @contextlib.contextmanager
+    def _read_lock(self):
+        """Wait until no write is under way and keep the writers out, so no row is read half written"""
+        if self._lock_owner == threading.get_ident():
+            # Reading while writing, e.g. a rewrite
+            yield
+        else:
+            with shared_file_lock(self.lock_path):
+                yield
+
+    def create(self):
+        """Create an empty log if it does not exist, return True if it was created"""
+        raise NotImplementedError
+
+    def append(self, data: dict, on_written=None) -> int:
+        """Append a session and return its row id.
+        on_written(rows, signature, new_signature) is called with the log lock held after every write,
+        rows being the (row_id, session) pairs it added and signature the one of the log before it"""
+        raise NotImplementedError
+
+    def insert_many(self, rows: list, on_written=None) -> int:
+        """Add many sessions in a single write, keeping the log in chronological order.
+        Return the number of sessions written. on_written as in append, row ids are None
+        when the log was rewritten"""
+        raise NotImplementedError
+
+    def read_log(self) -> "pd.DataFrame":
+        """Read every session, dates parsed"""
+        raise NotImplementedError
+
+    def read_columns(self, columns: list) -> "pd.DataFrame":
+        """Read only some columns of every session"""
+        return self.read_log()[columns]
+
+    def read_day(self, day: str) -> list:
+        """Read the sessions of a single day as a list of dicts"""
+        raise NotImplementedError
+
+    def read_range(self, since: str = None, until: str = None) -> "pd.DataFrame":
+        """Read the sessions of the days from since to until, both included, dates parsed"""
+        raise NotImplementedError
+
+    def total_by(self, by="subject") -> "pd.Series":
+        """Total time grouped by day, subject or session, or by a list of them"""
+        for column in [by] if isinstance(by, str) else by:
+            _check_group(column)
+        columns = [by] if isinstance(by, str) else list(by)
+        return self.read_columns(columns + ["total_time"]).groupby(by, observed=True)["total_time"].sum()
+
+    def session_totals(self) -> "pd.Series":
+        """Duration in seconds of every session"""
+        return self.read_columns(["total_time"])["total_time"].dt.total_seconds()
+
+    def compact(self) -> int:
+        """Rewrite the log, return the number of sessions"""
+        raise NotImplementedError
+
+
+class CSVStorage(LogStorage):
+    """Human-editable csv log, the original format.
+
+    Many processes can write the same log: rows are queued in a spool file and
+    whoever holds the log lock appends every queued row in a single write, so
+    sessions ended at the same moment share one fsync and no row is lost.
+    The log is read through a binary snapshot synced on every read, see Snapshot.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.spool_path = os.path.splitext(path)[0] + ".pending"
+
+    def create(self):
+        if os.path.exists(self.path):
+            return False
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            f.write("," + ",".join(COLUMNS) + "\n")
+        return True
+
+    def next_id(self) -> int:
+        """Get the id of the next row without loading the log"""
+        last_line = read_last_line(self.path)
+        try:
+            return int(last_line.split(",", 1)[0]) + 1
+        except ValueError:
+            # Only the header is in the file
+            return 0
+
+    def append(self, data: dict, on_written=None) -> int:
+        # Queue the row, the next lock holder commits it with the others waiting
+        token = f"{os.getpid()}-{uuid.uuid4().hex}"
+        row = _csv_row(None, data)[1:]
+        with file_lock(self.spool_path) as spool:
+            spool.write(json.dumps([token] + row) + "\n")
+
+        try:
+            with self._write_lock():
+                row_ids = self._commit_spool(on_written)
+        except Exception:
+            # The caller keeps the session, no later lock holder may commit it behind its back
+            self._unqueue(token)
+            raise
+        if token in row_ids:
+            return row_ids[token]
+
+        # Committed by an earlier lock holder, the row is near the end of the log
+        return self._find_row_id(row)
+
+    def _unqueue(self, token: str):
+        """Remove a row from the spool, if it is still queued"""
+        with file_lock(self.spool_path) as spool:
+            spool.seek(0)
+            lines = [line for line in spool if line.strip() and json.loads(line)[0] != token]
+            spool.truncate(0)
+            spool.writelines(lines)
+
+    def _commit_spool(self, on_written=None) -> dict:
+        """Append all the queued rows in one write, return their ids by token. The log lock must be held.
+        on_written gets every row committed, the ones queued by other processes too"""
+        with file_lock(self.spool_path) as spool:
+            spool.seek(0)
+            entries = [json.loads(line) for line in spool if line.strip()]
+            if not entries:
+                return {}
+
+            # The spool is emptied only once the rows are on disk
+            signature = self.signature()
+            first_id = self.next_id()
+            values = [[first_id + i] + entry[1:] for i, entry in enumerate(entries)]
+            append_csv_rows(self.path, values)
+            spool.truncate(0)
+
+        self._appended([(row[0], _parse_row(row)) for row in values], signature, on_written)
+        return {entry[0]: first_id + i for i, entry in enumerate(entries)}
+
+    def _appended(self, rows: list, signature: tuple, on_written=None):
+        """Report rows just appended under the log lock to the day index, the snapshot and to on_written"""
+        new_signature = self.signature()
+        index = DayIndex(DayIndex.path_for(self.path))
+        if index.load():
+            index.appended(signature, new_signature)
+            index.save()
+        snapshot = Snapshot(Snapshot.path_for(self.path))
+        if os.path.isdir(snapshot.path):
+            with file_lock(snapshot.lock_path):
+                if snapshot.load():
+                    snapshot.appended(signature, new_signature)
+                    snapshot.save()
+        if on_written is not None:
+            on_written(rows, signature, new_signature)
+
+    def _find_row_id(self, row: list) -> int:
+        for line in iter_lines_reversed(self.path):
+            values = next(csv.reader([line]))
+            if values[1:] == row:
+                return int(values[0])
+        return None
+
+    def insert_many(self, rows: list, on_written=None) -> int:
+        rows = sorted(rows, key=lambda data: data["start_time"])
+        if not rows:
+            return 0
+
+        with self._write_lock():
+            signature = self.signature()
+            # Sessions after the last logged one are appended, older ones need a rewrite
+            last_line = read_last_line(self.path)
+            values = next(csv.reader([last_line]), [])
+            if len(values) < 7 or values[1] == "day" or datetime.fromisoformat(values[2]) <= rows[0]["start_time"]:
+                first_id = self.next_id()
+                append_csv_rows(self.path, [_csv_row(first_id + i, data) for i, data in enumerate(rows)])
+                self._appended([(first_id + i, data) for i, data in enumerate(rows)], signature, on_written)
+            else:
+                df_log = concat_logs([self.read_log(), frame_from_rows([{"id": -1, **data} for data in rows])])
+                self._rewrite(df_log)
+                if on_written is not None:
+                    on_written([(None, data) for data in rows], signature, self.signature())
+        return len(rows)
+
+    def read_day(self, day: str) -> list:
+        # Rows are appended in chronological order, so the sessions of a day
+        # are found by reading the log backwards until an earlier day shows up
+        rows = []
+        for line in iter_lines_reversed(self.path):
+            values = next(csv.reader([line]))
+            if len(values) < 7 or values[1] == "day" or values[1] < day:
+                break
+            if values[1] == day:
+                rows.append(_parse_row(values))
+
+        rows.reverse()
+        return rows
+
+    def read_range(self, since: str = None, until: str = None) -> "pd.DataFrame":
+        # No row is half written while the range is read
+        with self._read_lock():
+            index = DayIndex(DayIndex.path_for(self.path))
+            index.load()
+            if index.refresh(self.path, self.signature()):
+                index.save()
+
+            # Days out of order cannot be found by offset
+            if not index.chronological:
+                return _filter_days(self.read_log(), since, until)
+
+            # Only the bytes of the range are parsed
+            start, end = index.byte_range(since, until)
+            with open(self.path, "rb") as f:
+                header = f.readline()
+                f.seek(start)
+                content = f.read() if end is None else f.read(end - start)
+        df_log = self._read_csv(io.BytesIO(header + content))
+
+        # The rows after the indexed size were not checked yet
+        return _filter_days(df_log, since, until)
+
+    def read_log(self) -> "pd.DataFrame":
+        return self.read_columns(None)
+
+    def read_columns(self, columns: list) -> "pd.DataFrame":
+        snapshot = Snapshot(Snapshot.path_for(self.path))
+        with self._read_lock():
+            try:
+                os.makedirs(snapshot.path, exist_ok=True)
+                with file_lock(snapshot.lock_path):
+                    self._sync_snapshot(snapshot)
+                    return snapshot.frame(columns)
+            except OSError:
+                # e.g. a read-only folder, parse the text instead
+                df_log = self._read_csv(self.path)
+                return df_log if columns is None else df_log[columns]
+
+    def _sync_snapshot(self, snapshot: Snapshot):
+        """Add the rows written to the log since the last sync. The snapshot lock and the read lock must be held,
+        so the last line is complete even without a newline"""
+        loaded = snapshot.load()
+        signature = self.signature()
+        if loaded and signature == snapshot.signature:
+            return
+
+        # Appends of the tracker keep the synced bytes, any other change is checked
+        if not loaded or (signature != snapshot.head and not snapshot.matches(self.path)):
+            snapshot.reset()
+
+        with open(self.path, "rb") as f:
+            header = f.readline()
+            f.seek(snapshot.size)
+            content = f.read()
+        df_new = self._read_csv(io.BytesIO(content if snapshot.size == 0 else header + content))
+        snapshot.append(df_new, content, signature)
+        snapshot.save()
+
+    def _read_csv(self, source) -> "pd.DataFrame":
+        import pandas as pd
+
+        df_log = pd.read_csv(source, index_col=0, dtype=CSV_DTYPES)
+        df_log.index.name = None
+        df_log["start_time"] = parse_timestamps(df_log["start_time"])
+        df_log["end_time"] = parse_timestamps(df_log["end_time"])
+        df_log["total_time"] = parse_durations(df_log["total_time"])
+        return compact_frame(df_log)
+
+    def compact(self) -> int:
+        with self._write_lock():
+            df_log = self.read_log()
+            self._rewrite(df_log)
+        return len(df_log)
+
+    def _rewrite(self, df_log: "pd.DataFrame"):
+        """Replace the log with the sessions of df_log, sorted and renumbered. The log lock must be held"""
+        df_log.sort_values("start_time", kind="stable", inplace=True)
+        df_log.reset_index(drop=True, inplace=True)
+
+        # Write to a temporary file first so a crash never truncates the log
+        tmp_path = f"{self.path}.tmp"
+        df_log.to_csv(tmp_path, index=True, date_format=TIME_FORMAT)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        # Rows moved, the day offsets and the snapshot are rebuilt on the next read
+        index_path = DayIndex.path_for(self.path)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        snapshot = Snapshot(Snapshot.path_for(self.path))
+        if os.path.isdir(snapshot.path):
+            with file_lock(snapshot.lock_path):
+                snapshot.save()
+
+
+class SQLiteStorage(LogStorage):
+    """Indexed SQLite log, filtering and aggregation run in SQL"""
+
+    queries_in_sql = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            day TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            total_us INTEGER NOT NULL,
+            session TEXT NOT NULL,
+            subject TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_day ON sessions(day);
+        CREATE INDEX IF NOT EXISTS idx_sessions_subject ON sessions(subject);
+        CREATE INDEX IF NOT EXISTS idx_sessions_session ON sessions(session);
+    """
+    SELECT = "SELECT id, day, start_time, end_time, total_us, session, subject FROM sessions"
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def signature(self) -> tuple:
+        # Recent writes live in the write-ahead log until a checkpoint
+        signature = super().signature()
+        wal_path = f"{self.path}-wal"
+        if os.path.exists(wal_path):
+            stat = os.stat(wal_path)
+            signature += (stat.st_mtime_ns, stat.st_size)
+        return signature
+
+    def create(self):
+        exists = os.path.exists(self.path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._connect().close()
+        return not exists
+
+    def append(self, data: dict, on_written=None) -> int:
+        # The tracker lock keeps the signatures around the insert to this write only
+        with self._write_lock():
+            signature = self.signature()
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO sessions (day, start_time, end_time, total_us, session, subject) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    _sql_row(data))
+            conn.close()
+            if on_written is not None:
+                on_written([(cursor.lastrowid, data)], signature, self.signature())
+        return cursor.lastrowid
+
+    def insert_many(self, rows: list, on_written=None) -> int:
+        # Queries sort by start time where the order matters, ids are just appended
+        rows = sorted(rows, key=lambda data: data["start_time"])
+        with self._write_lock():
+            signature = self.signature()
+            conn = self._connect()
+            with conn:
+                first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM sessions").fetchone()[0]
+                conn.executemany(
+                    "INSERT INTO sessions (day, start_time, end_time, total_us, session, subject) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [_sql_row(data) for data in rows])
+            conn.close()
+            if on_written is not None:
+                on_written([(first_id + i, data) for i, data in enumerate(rows)], signature, self.signature())
+        return len(rows)
+
+    def _query(self, where: str = "", params: tuple = ()) -> "pd.DataFrame":
+        import pandas as pd
+
+        conn = self._connect()
+        df_log = pd.read_sql_query(f"{self.SELECT} {where} ORDER BY id", conn, params=params, index_col="id")
+        conn.close()
+
+        # Same layout as the csv log
+        df_log.index.name = None
+        df_log["start_time"] = parse_timestamps(df_log["start_time"])
+        df_log["end_time"] = parse_timestamps(df_log["end_time"])
+        df_log.insert(3, "total_time", pd.to_timedelta(df_log.pop("total_us"), unit="us"))
+        return compact_frame(df_log)
+
+    def read_log(self) -> "pd.DataFrame":
+        return self._query()
+
+    def read_day(self, day: str) -> list:
+        conn = self._connect()
+        rows = conn.execute(f"{self.SELECT} WHERE day = ? ORDER BY id", (day,)).fetchall()
+        conn.close()
+        return [_parse_row(row[:4] + (timedelta(microseconds=row[4]),) + row[5:]) for row in rows]
+
+    def read_range(self, since: str = None, until: str = None) -> "pd.DataFrame":
+        # Served by the index on day
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("day >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("day <= ?")
+            params.append(until)
+        return self._query(f"WHERE {' AND '.join(conditions)}" if conditions else "", tuple(params))
+
+    def total_by(self, by="subject") -> "pd.Series":
+        import pandas as pd
+
+        # A single column or a list of columns
+        columns = [by] if isinstance(by, str) else list(by)
+        for column in columns:
+            _check_group(column)
+        group = ", ".join(columns)
+
+        conn = self._connect()
+        rows = conn.execute(f"SELECT {group}, SUM(total_us) FROM sessions GROUP BY {group} ORDER BY {group}").fetchall()
+        conn.close()
+
+        totals = pd.to_timedelta([row[-1] for row in rows], unit="us")
+        if isinstance(by, str):
+            index = pd.Index([row[0] for row in rows], name=by)
+        else:
+            index = pd.MultiIndex.from_tuples([row[:-1] for row in rows], names=columns)
+        return pd.Series(totals, index=index, name="total_time")
+
+    def session_totals(self) -> "pd.Series":
+        import pandas as pd
+
+        conn = self._connect()
+        rows = conn.execute("SELECT id, total_us FROM sessions ORDER BY id").fetchall()
+        conn.close()
+        return pd.Series([row[1] / 1e6 for row in rows], index=[row[0] for row in rows], dtype=float)
+
+    def compact(self) -> int:
+        conn = self._connect()
+        count = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        conn.execute("VACUUM")
+        conn.close()
+        return count
+
+
+def parse_timestamps(values: "pd.Series") -> "pd.Series":
+    """Parse timestamps with the log format, rows written without microseconds fall back to ISO 8601"""
+    import pandas as pd
+
+    parsed = pd.to_datetime(values, format=TIME_FORMAT, errors="coerce")
+    missing = parsed.isna() & values.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(values[missing], format="ISO8601")
+    return parsed
+
+
+def parse_durations(values: "pd.Series") -> "pd.Series":
+    """Parse durations like 0 days 01:11:15.885343 from their fixed layout, other layouts fall back to pandas"""
+    import numpy as np
+    import pandas as pd
+
+    raw = values.fillna("").to_numpy(dtype="S")
+    nanoseconds = np.zeros(len(raw), dtype=np.int64)
+    parsed = np.zeros(len(raw), dtype=bool)
+
+    if len(raw) > 0:
+        # One row of bytes per duration, grouped by length so every field sits at a fixed column
+        chars = raw.view(np.uint8).reshape(len(raw), raw.dtype.itemsize)
+        lengths = np.char.str_len(raw)
+        for length in np.unique(lengths[lengths >= 22]):
+            rows = np.flatnonzero(lengths == length)
+            days, separator, clock = (chars[rows, :length - 21], chars[rows, length - 21:length - 15],
+                                      chars[rows, length - 15:length])
+            digits = np.concatenate([days, clock[:, [0, 1, 3, 4, 6, 7, 9, 10, 11, 12, 13, 14]]], axis=1)
+
+            valid = ((separator == np.frombuffer(b" days ", dtype=np.uint8)).all(axis=1)
+                     & (clock[:, 2] == ord(":")) & (clock[:, 5] == ord(":")) & (clock[:, 8] == ord("."))
+                     & ((digits >= ord("0")) & (digits <= ord("9"))).all(axis=1))
+
+            total = (_to_number(days) * 86400 + _to_number(clock[:, 0:2]) * 3600
+                     + _to_number(clock[:, 3:5]) * 60 + _to_number(clock[:, 6:8])) * 10**9 + _to_number(clock[:, 9:15]) * 1000
+            nanoseconds[rows[valid]] = total[valid]
+            parsed[rows[valid]] = True
+
+    durations = pd.Series(pd.to_timedelta(nanoseconds, unit="ns"), index=values.index)
+
+    # Negative durations, clocks without microseconds and missing values
+    if not parsed.all():
+        durations[~parsed] = pd.to_timedelta(values[~parsed])
+    return durations
+
+
+def _to_number(digits) -> "np.ndarray":
+    """Turn a matrix of ascii digits into one integer per row"""
+    import numpy as np
+
+    number = np.zeros(len(digits), dtype=np.int64)
+    for column in range(digits.shape[1]):
+        number = number * 10 + digits[:, column] - ord("0")
+    return number
+
+
+def compact_frame(df_log: "pd.DataFrame") -> "pd.DataFrame":
+    """Store day, session and subject as categories and times as int64 nanoseconds"""
+    return df_log.astype({"day": "category", "session": "category", "subject": "category",
+                          "start_time": "datetime64[ns]", "end_time": "datetime64[ns]",
+                          "total_time": "timedelta64[ns]"})
+
+
+def frame_from_rows(rows: list) -> "pd.DataFrame":
+    """Build a typed log frame from row dicts, as returned by read_day"""
+    import pandas as pd
+
+    df_log = pd.DataFrame(rows, columns=["id"] + COLUMNS).set_index("id")
+    df_log.index.name = None
+    return compact_frame(df_log)
+
+
+def concat_logs(frames: list) -> "pd.DataFrame":
+    """Concatenate log frames, merging the categories instead of falling back to strings"""
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    # Empty frames have no category dtype to merge with
+    frames = [frame for frame in frames if len(frame) > 0] or frames[:1]
+
+    df_log = pd.concat(frames)
+    for column in ("day", "session", "subject"):
+        df_log[column] = union_categoricals([frame[column] for frame in frames])
+    return df_log
+
+
+def _filter_days(df_log: "pd.DataFrame", since: str = None, until: str = None) -> "pd.DataFrame":
+    """Rows of the days from since to until, ISO dates compare as strings"""
+    days = df_log["day"].astype(str)
+    mask = (days >= (since or "")) & (days <= (until or "9999-12-31"))
+    return df_log[mask.to_numpy()]
+
+
+def _check_group(by: str):
+    if by not in GROUP_COLUMNS:
+        raise ValueError(f"Cannot group by {by}. Please choose from: {GROUP_COLUMNS}")
+
+
+def _parse_row(values) -> dict:
+    """Parse a raw row of the log, in the csv column order with the id first"""
+    total_time = values[4] if isinstance(values[4], timedelta) else parse_timedelta_log(values[4])
+    return {"id": int(values[0]), "day": values[1],
+            "start_time": datetime.fromisoformat(values[2]), "end_time": datetime.fromisoformat(values[3]),
+            "total_time": total_time, "session": values[5], "subject": values[6]}
+
+
+def _csv_row(row_id: int, data: dict) -> list:
+    """Format a session as pandas would write it"""
+    return [row_id, str(data["day"]),
+            data["start_time"].isoformat(sep=" ", timespec="microseconds"),
+            data["end_time"].isoformat(sep=" ", timespec="microseconds"),
+            format_timedelta_log(data["total_time"]), data["session"], data["subject"]]
+
+
+def _sql_row(data: dict) -> tuple:
+    total_us = (data["total_time"].days * 86400 + data["total_time"].seconds) * 10**6 + data["total_time"].microseconds
+    return (str(data["day"]),
+            data["start_time"].isoformat(sep=" ", timespec="microseconds"),
+            data["end_time"].isoformat(sep=" ", timespec="microseconds"),
+            total_us, data["session"], data["subject"])
+
+
+def open_storage(path: str = DEFAULT_LOG_PATH) -> LogStorage:
+    """Pick the backend from the file extension"""
+    if os.path.splitext(path)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteStorage(path)
+    return CSVStorage(path)
+
+
+def migrate_csv_to_sqlite(csv_path: str, db_path: str) -> int:
+    """Copy an existing csv log into a new SQLite log, keeping the row ids"""
+    df_log = CSVStorage(csv_path).read_log()
+
+    target = SQLiteStorage(db_path)
+    target.create()
+    conn = target._connect()
+    if conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] > 0:
+        conn.close()
+        raise ValueError(f"{db_path} already contains sessions")
+
+    rows = [(int(row_id),) + _sql_row(row._asdict())
+            for row_id, row in zip(df_log.index, df_log.itertuples(index=False))]
+    with conn:
+        conn.executemany(
+            "INSERT INTO sessions (id, day, start_time, end_time, total_us, session, subject) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows)
+    conn.close()
+    return len(rows)
@@ -1,19 +1,38 @@
-import pandas as pd
 from datetime import datetime
-import time
-import threading
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
-import seaborn as sns
+import os
+import shutil
+
+# pandas, matplotlib and seaborn are imported where they are needed,
+# so that starting and ending a session stays fast
 
 
 from utils import *
+from storage import DEFAULT_LOG_PATH, GROUP_COLUMNS, open_storage, frame_from_rows, concat_logs
+from rollups import ROLLUP_GROUPS, Rollups
+from aggregate import stream_totals
+from profiling import span
+from analytics import day_stats, pause_history
+from importer import drop_logged, find_overlaps, format_errors, read_sessions, validate_sessions
+from plotting import DEFAULT_MAX_POINTS, FigureCache, days_figure, draw_figure, figure_key, plot_format, sessions_figure
+from writer import BackgroundWriter
+from ticker import TICKER
 
 class StudyTracker:
-    def __init__(self, path:str="./Logs/study_sessions.csv") -> None:
+    def __init__(self, path:str=DEFAULT_LOG_PATH) -> None:
         # Read df with sessions
         self.path = path
-        self.data = pd.read_csv(self.path) 
+        self.storage = open_storage(self.path)
+        self.rollups_path = Rollups.path_for(self.path)
+
+        # Cached view of the log, see _open_log
+        self._log_cache = None
+        self._log_signature = None
+        self._pending_rows = []
+        # True while the cached start times are sorted, see sessions_between
+        self._log_chronological = False
+
+        # Sessions are written on a background thread, readers flush it first
+        self.writer = BackgroundWriter(self.storage, self._log_written)
         
         # Define is studying
         self.is_studying : bool = None
@@ -23,11 +42,14 @@ class StudyTracker:
         self.valid_sessions = ["Morning", "Afternoon", "Evening"]
 
 
-    def start_session(self, subject: str = None, session:str=None, begin_time=None):
+    @property
+    def data(self):
+        """The whole log, loaded on first access"""
+        return self._open_log()
+
+
+    def start_session(self, subject: str = None, session:str=None, begin_time=None, show_timer: bool = True):
         if self.is_studying != True:
-            # Set Studying to True 
-            self.is_studying = True
-                    
             # Validate subject and session
             assert subject is not None, "Input a Subject!"
             self.subject = subject
@@ -39,76 +61,72 @@ class StudyTracker:
             if self.session not in self.valid_sessions:
                 raise ValueError(f"{self.subject} is not a valid subject. Please choose from: {self.valid_sessions}")
             
+            # Set Studying to True 
+            self.is_studying = True
+
             # Capture the start time
             self.start_time = datetime.now() if begin_time == None else begin_time
             
             print(f"\nStudy session started at {self.start_time.strftime('%H:%M:%S')}")
             
             # Call function to upadate timer 
-            self._display_timer()
+            if show_timer:
+                self._display_timer()
         
         else:
             print(f"Session already started at {self.start_time.strftime('%H:%M:%S')}")
 
 
+    def resume_session(self, subject: str, session: str, begin_time: datetime):
+        """Restore a session started by another process, without starting the timer"""
+        self.subject = subject
+        self.session = session
+        self.start_time = begin_time
+        self.is_studying = True
+
+
     def _display_timer(self):
-        def update_timer():
-            # retrieve time passsed today
-            out = self._today_stats()
-            time_today = out[1]
-            # try to retrieve pause, 
-            try:
-                pause_now = self.start_time - out[0].iloc[-1,2]
-            except IndexError:
-                pause_now = timedelta(0)
-            pause_today = out[2]
-            pause_today = pause_today + pause_now
-
-            while self.is_studying:
-                # Format the elapsed time
-                current_time = datetime.now()
-                elapsed = current_time - self.start_time
-                total_seconds = int(elapsed.total_seconds())
-                hours, remainder = divmod(total_seconds, 3600)
-                minutes, seconds = divmod(remainder, 60)
-
-                
-                # Print total time today
-                time_studying = time_today + elapsed
-                total_seconds_studied = int(time_studying.total_seconds())
-                hours_studied, remainder_studied = divmod(total_seconds_studied, 3600)
-                minutes_studied, seconds_studied = divmod(remainder_studied, 60)
-
-                # Print Pauses today
-                total_seconds_pause = int(pause_today.total_seconds())
-                hours_pause, remainder_pause = divmod(total_seconds_pause, 3600)
-                minutes_pause, seconds_pause = divmod(remainder_pause, 60)
-
-
-                # Print total time today
-                mess_1 = f"Studying for: {hours:02}:{minutes:02}:{seconds:02}"
-                mess_2 = f"Time spent studying today: {hours_studied:02}:{minutes_studied:02}:{seconds_studied:02}"
-                mess_3 = f"Total pauses today: {hours_pause:02}:{minutes_pause:02}:{seconds_pause:02}"
-                print(f"\r{mess_1} | {mess_2} | {mess_3}", end="")
-
-                # Wait until next iteration
-                time.sleep(1)
-
-        timer_thread = threading.Thread(target=update_timer, daemon=True)
-        timer_thread.start()
+        """Show the live timer of this session until it ends or is aborted"""
+        # retrieve time passsed today, once
+        out = self._today_summary()
+        time_today = out[1]
+        # try to retrieve pause, 
+        try:
+            pause_now = self.start_time - out[0][-1]["end_time"]
+        except IndexError:
+            pause_now = timedelta(0)
+        pause_today = out[2] + pause_now
+        mess_3 = f"Total pauses today: {format_timedelta_hms(pause_today)}"
+        start = self.start_time.timestamp()
+
+        def render(now: float) -> str:
+            elapsed = timedelta(seconds=now - start)
+            mess_1 = f"Studying for: {format_timedelta_hms(elapsed)}"
+            mess_2 = f"Time spent studying today: {format_timedelta_hms(time_today + elapsed)}"
+            return f"{mess_1} | {mess_2} | {mess_3}"
+
+        TICKER.add(self, self.subject, render)
 
     def abort_session(self):
         if self.is_studying == True:
             self.is_studying = False
+            TICKER.remove(self)
             print(f"Study session of {self.start_time.strftime('%H:%M:%S')} aborted")
         else:
             print(f"Study session of {self.start_time.strftime('%H:%M:%S')} already aborted")
 
 
+    def release_session(self):
+        """Stop the timer of a session ended or aborted by another process, without saving it"""
+        self.is_studying = False
+        TICKER.remove(self)
+
+
     def end_session(self):
         if self.is_studying == True:
             self.end_time = datetime.now()
             self.is_studying = False
+            TICKER.remove(self)
             print(f"Study session ended at {self.end_time.strftime('%H:%M:%S')}")
         else:
             print(f"Session already ended at: {self.end_time.strftime('%H:%M:%S')}")
@@ -129,31 +147,25 @@ class StudyTracker:
 
 
     def save(self, data: dict = None):
-        # Build df
-        df_cache = pd.DataFrame(data, index=[0])
-
-        # Convert to datetime
-        df_cache['total_time'] = pd.to_timedelta(df_cache['total_time'])
-        df_cache['start_time'] = pd.to_datetime(df_cache['start_time'])
-        df_cache['end_time'] = pd.to_datetime(df_cache['end_time'])
+        # Today's sessions include the ones still queued, so the summary needs no write
+        today = datetime.now().date().strftime("%Y-%m-%d")
+        with span("today summary"):
+            with self.writer.lock:
+                rows_today = self.storage.read_day(today) + [
+                    row for row in self.writer.pending() + [data] if str(row["day"]) == today
+                ]
+            studied, total_pauses, last_pause = day_stats(rows_today)
 
-        # Read df
-        df_study = pd.read_csv("./logs/study_sessions.csv", index_col=0)
+        # Append only the new row, in the background
+        with span("queue row"):
+            self.writer.submit(data)
 
-        # concat and save
-        df_study = pd.concat([df_study, df_cache], axis=0, ignore_index=False)
-        df_study.reset_index(drop=True, inplace=True)
-        df_study.to_csv("./logs/study_sessions.csv", index=True)        
-        
-        print(f"File saved at: ./logs/study_sessions.csv")
+        print(f"Saving to: {self.path}")
 
 
         # total time 
         total_time = (self.end_time - self.start_time)
 
-        # get today stats to print
-        _, studied, total_pauses, last_pause = self._today_stats()
-
         # print message
         mess_1 = f"Studied for: {format_timedelta_hms(total_time)}"
         mess_2 = f"Time studied today: {format_timedelta_hms(studied)}"
@@ -167,108 +179,349 @@ class StudyTracker:
 
 
 
-    def _open_log(self):
-        """Open the log file parsing the dates"""
-        df_log = pd.read_csv("./logs/study_sessions.csv", index_col=0, parse_dates=['start_time', 'end_time'])
-        df_log['total_time'] = pd.to_timedelta(df_log['total_time'])
-        return df_log
+    def flush(self):
+        """Wait until the sessions saved so far are in the log"""
+        self.writer.flush()
 
 
-    def _today_stats(self):
-        """Get the stats for today"""
-        df_log = self._open_log()
+    def import_sessions(self, path: str) -> tuple:
+        """Validate the sessions of a csv or jsonl file and add them to the log in a single write.
+        Nothing is written if any session is invalid. Return the number of sessions imported
+        and of duplicates skipped"""
+        from datetime import timedelta
 
-        
-        # filter 
-        today = datetime.now().date().strftime("%Y-%m-%d")
-        df_today = df_log[df_log['day'] == today]
-        
-        # if not first time of the day
-        if len(df_today) != 0:        
+        self.flush()
+        with span("read import"):
+            df_new = read_sessions(path)
+        if len(df_new) == 0:
+            return 0, 0
 
-            # get total time studied
-            total_studied = df_today["total_time"].sum()
+        with span("validate import"):
+            # Only the logged days around the import can collide with it
+            if df_new["start_time"].notna().any():
+                since = (df_new["start_time"].min() - timedelta(days=1)).date()
+                df_log = self.sessions_between(since, df_new["end_time"].max().date())
+            else:
+                df_log = frame_from_rows([])
 
-            # compute total pauses
-            total_pauses = max(df_today["end_time"]) - min(df_today["start_time"]) - total_studied
+            # Sessions already logged are skipped, not checked again
+            df_new, duplicates = drop_logged(df_new, df_log)
 
-            # last begin - penultimate end
-            try:
-                last_pause = df_today.iloc[-1,1] - df_today.iloc[-2,2]
-            
-            except IndexError:
-                last_pause = timedelta(0)
+            errors, total = validate_sessions(df_new, self.valid_subjects, self.valid_sessions)
+            if not total:
+                errors, total = find_overlaps(df_new, df_log)
+            if total:
+                raise ValueError(f"Nothing imported, problems found: {total}\n{format_errors(errors, total)}")
 
-        else:
-            total_studied = timedelta(0)
-            total_pauses = timedelta(0)
-            last_pause = timedelta(0)
-        
-        return df_today, total_studied, total_pauses, last_pause
-    
-    def plot_all_sessions(self):
-        # Setting plot context 
-        sns.set_context("notebook")  
-        sns.set_style("darkgrid")
+        rows = [{"day": row.day, "start_time": row.start_time.to_pydatetime(), "end_time": row.end_time.to_pydatetime(),
+                 "total_time": row.total_time.to_pytimedelta(), "session": row.session, "subject": row.subject}
+                for row in df_new.itertuples()]
 
-        df_ex = self._open_log()
+        # The rollups get the new sessions added, see _log_written
+        with span("write import"):
+            self.storage.insert_many(rows, self._log_written)
 
-        # Computing total seconds
-        df_ex['total_time_seconds'] = df_ex['total_time'].dt.total_seconds()
+        return len(rows), duplicates
 
-        # Create the plot
-        plt.figure(figsize=(10, 6))
-        sns.lineplot(data=df_ex, x=df_ex.index, y="total_time_seconds")
 
-        # Format the y-axis to show time in HH:MM:SS
-        formatter = FuncFormatter(seconds_to_hms)
-        plt.gca().yaxis.set_major_formatter(formatter)
+    def compact_log(self):
+        """Rewrite the log renumbering the rows, the file is replaced atomically"""
+        self.flush()
+        rollups = Rollups(self.rollups_path)
+        rollups_current = rollups.load() and rollups.is_current(self.storage.signature())
 
-        plt.xlabel('Index')
-        plt.ylabel('Total Time (HH:MM:SS)')
-        plt.title('Time per Session')
-        plt.show()
+        count = self.storage.compact()
+        self._log_cache = None
 
+        # Compaction does not change the totals
+        if rollups_current:
+            rollups.signature = self.storage.signature()
+            rollups.save()
+        print(f"Compacted {count} sessions in: {self.path}")
 
-    def plot_days_total(self, figsize:tuple=(15,9)):
-        # Setting plot context 
-        sns.set_context("notebook")  
-        sns.set_style("darkgrid")
 
-        df_ex = self._open_log()
+    def _open_log(self):
+        """Open the log file parsing the dates, cached until the file changes"""
+        self.flush()
+        signature = self.storage.signature()
+        if self._log_cache is None or signature != self._log_signature:
+            # Timed apart from the parsing, read_log imports it anyway
+            with span("import pandas"):
+                import pandas
+            with span("read_log"):
+                self._log_cache = self.storage.read_log()
+            self._log_signature = signature
+            self._pending_rows = []
+            self._log_chronological = self._log_cache["start_time"].is_monotonic_increasing
+
+        elif self._pending_rows:
+            # Add the sessions saved by this tracker without reparsing the log
+            with span("merge pending rows"):
+                df_new = frame_from_rows(self._pending_rows)
+                self._log_chronological = (self._log_chronological and df_new["start_time"].is_monotonic_increasing
+                                           and (len(self._log_cache) == 0
+                                                or df_new["start_time"].iloc[0] >= self._log_cache["start_time"].iloc[-1]))
+                self._log_cache = concat_logs([self._log_cache, df_new])
+            self._pending_rows = []
+
+        # shallow copy, callers can add columns without touching the cache
+        return self._log_cache.copy(deep=False)
+
+
+    def _log_written(self, rows: list, signature: tuple, new_signature: tuple):
+        """Keep the cached log and the rollups in sync with a write of the storage, called with the log lock held.
+        rows are the (row_id, session) pairs written, the ones queued by other processes too.
+        Runs on the writer thread, it must not flush"""
+        # Only if nobody else touched the file since it was cached, and rows were only appended
+        if (self._log_cache is not None and signature == self._log_signature
+                and all(row_id is not None for row_id, _ in rows)):
+            self._pending_rows.extend({"id": row_id, **data, "day": str(data["day"])} for row_id, data in rows)
+            self._log_signature = new_signature
+        else:
+            self._log_cache = None
+
+        # Stale rollups are left alone, the next reader rebuilds them
+        rollups = Rollups(self.rollups_path)
+        if rollups.load() and rollups.is_current(signature):
+            for _, data in rows:
+                rollups.add(data, new_signature)
+            rollups.save()
+
+
+    def _rollups(self) -> Rollups:
+        """Load the rollups, rebuilding them if the log changed behind their back"""
+        self.flush()
+        rollups = Rollups(self.rollups_path)
+        with span("load rollups"):
+            current = rollups.load() and rollups.is_current(self.storage.signature())
+        if current:
+            return rollups
+        with span("rebuild rollups"):
+            return self.rebuild_rollups()
+
+
+    def rebuild_rollups(self) -> Rollups:
+        """Aggregate the whole log again and save the rollups"""
+        self.flush()
+        signature = self.storage.signature()
+        if self.storage.queries_in_sql:
+            totals = {name: self.storage.total_by(by) for name, by in ROLLUP_GROUPS.items()}
+        else:
+            df_log = self._open_log()
+            with span("groupby"):
+                totals = {name: df_log.groupby(by, observed=True)["total_time"].sum() for name, by in ROLLUP_GROUPS.items()}
+
+        rollups = Rollups(self.rollups_path)
+        rollups.rebuild(totals, signature)
+        rollups.save()
+        return rollups
+
+
+    def _total_by(self, by: str, chunksize: int = None):
+        """Total time by day, subject, session or subject_day, read from the rollups.
+        With a chunksize the log is aggregated again, streaming it in chunks of that many rows"""
+        if chunksize is None:
+            return self._rollups().total_by(by)
+        self.flush()
+        with span("stream totals"):
+            if self.storage.queries_in_sql:
+                return self.storage.total_by(by)
+            return stream_totals(self.path, by, chunksize)[by]
+
+
+    def sessions_between(self, since=None, until=None) -> "pd.DataFrame":
+        """Sessions of the days from since to until, both included, as dates or YYYY-MM-DD strings.
+        Only the rows of the range are read, an open bound reaches the start or the end of the log"""
+        self.flush()
+        since = str(since) if since is not None else None
+        until = str(until) if until is not None else None
+
+        # A log already in memory is sliced instead of read again
+        if self._log_cache is not None:
+            with span("slice cached log"):
+                return self._slice_log(self._open_log(), since, until)
+        with span("read range"):
+            return self.storage.read_range(since, until)
+
+
+    def _slice_log(self, df_log, since: str = None, until: str = None):
+        """Rows of a date range found by binary search on the sorted start times"""
+        import numpy as np
+
+        start_times = df_log["start_time"].to_numpy()
+        lower = np.datetime64(since, "ns") if since is not None else None
+        upper = (np.datetime64(until, "D") + 1).astype("datetime64[ns]") if until is not None else None
+
+        if not self._log_chronological:
+            mask = np.ones(len(df_log), dtype=bool)
+            if lower is not None:
+                mask &= start_times >= lower
+            if upper is not None:
+                mask &= start_times < upper
+            return df_log[mask]
+
+        first = np.searchsorted(start_times, lower) if lower is not None else 0
+        last = np.searchsorted(start_times, upper) if upper is not None else len(df_log)
+        return df_log.iloc[first:last]
+
+
+    def time_between(self, by: str = "subject", since=None, until=None) -> "pd.Series":
+        """Total time by day, subject or session of the sessions from since to until"""
+        if by not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by {by}. Please choose from: {GROUP_COLUMNS}")
+        return self.sessions_between(since, until).groupby(by, observed=True)["total_time"].sum()
+
+
+    def efficiency_history(self, since=None, until=None) -> "pd.DataFrame":
+        """Pauses and efficiency of every day, of a date range if given"""
+        if since is not None or until is not None:
+            df_log = self.sessions_between(since, until)
+        else:
+            df_log = self._open_log()
+        with span("pause history"):
+            return pause_history(df_log)
+
+
+    def display_efficiency(self, since=None, until=None):
+        """Print the pauses and efficiency of every day and over the whole period"""
+        history = self.efficiency_history(since, until)
+        if len(history) == 0:
+            print("No study sessions recorded in this period.")
+            return
+
+        table = history.copy()
+        for column in ("studied", "pauses", "longest_break", "last_pause"):
+            table[column] = table[column].map(format_timedelta_hms)
+        table["efficiency"] = table["efficiency"].round(2)
+        print(table.to_string())
+
+        studied, pauses = history["studied"].sum(), history["pauses"].sum()
+        print(f"\nDays: {len(history)} | Time studied: {format_timedelta_hms(studied)} | "
+              f"Total pauses: {format_timedelta_hms(pauses)} | "
+              f"Efficiency: {studied.total_seconds() / (studied + pauses).total_seconds():.2f}")
 
-        # Aggregate days
-        df_grouped = df_ex.groupby(["day"]).agg({"total_time": "sum"})
 
-        # Find time for each 
-        df_grouped['total_time_seconds'] = df_grouped['total_time'].dt.total_seconds()
+    def _today_summary(self):
+        """Get the sessions of today as a list of dicts and their stats, without pandas"""
+        self.flush()
+        # filter 
+        today = datetime.now().date().strftime("%Y-%m-%d")
+        rows_today = self.storage.read_day(today)
+        total_studied, total_pauses, last_pause = day_stats(rows_today)
+        return rows_today, total_studied, total_pauses, last_pause
+
+
+    def display_today(self):
+        """Print the stats and the sessions of today"""
+        today_data, total_time, total_pauses, last_pause = self._today_stats()
+        print(f"\nToday's Statistics:")
+        print(f"Total time studied: {format_timedelta_hms(total_time)}")
+        print(f"Total pauses: {format_timedelta_hms(total_pauses)}")
+        print(f"Last pause duration: {format_timedelta_hms(last_pause)}")
+        if total_time.total_seconds() > 0 and total_pauses.total_seconds() > 0:
+            efficiency = total_time.total_seconds() / (total_time.total_seconds() + total_pauses.total_seconds())
+            print(f"Efficiency: {efficiency:.2f}")
+        print("\nToday's sessions:")
+        if len(today_data) > 0:
+            print(today_data)
+        else:
+            print("No study sessions recorded today.")
 
-        # Create the plot
-        plt.figure(figsize=figsize)
-        sns.barplot(data=df_grouped, x=df_grouped.index, y="total_time_seconds")
 
-        # Format the y-axis to show time in HH:MM:SS
-        formatter = FuncFormatter(seconds_to_hms)
-        plt.gca().yaxis.set_major_formatter(formatter)
+    def _today_stats(self):
+        """Get the stats for today"""
+        with span("today summary"):
+            rows_today, total_studied, total_pauses, last_pause = self._today_summary()
 
-        plt.xlabel('Day')
-        plt.ylabel('Total Time (HH:MM:SS)')
-        plt.title('Total Time Spent Studying')
-        plt.show()
+        # same layout as the log
+        with span("build today frame"):
+            df_today = frame_from_rows(rows_today)
+
+        return df_today, total_studied, total_pauses, last_pause
+    
+    def plot_all_sessions(self, path: str = None, max_points: int = DEFAULT_MAX_POINTS):
+        """Plot the length of every session. With a .png/.svg path the plot is rendered
+        without a display and saved there, long histories are downsampled to max_points"""
+        return self._plot("sessions", self._draw_sessions, (10, 6), path, max_points=max_points)
+
+
+    def plot_days_total(self, figsize:tuple=(15,9), chunksize: int = None, path: str = None,
+                        max_points: int = DEFAULT_MAX_POINTS):
+        """Plot the total time of every day, saved to path like plot_all_sessions"""
+        return self._plot("days", self._draw_days_total, figsize, path, chunksize=chunksize, max_points=max_points)
+
+
+    def _plot(self, name: str, draw, figsize: tuple, path: str = None, **params):
+        """Show a plot, or render it headless to path reusing the figure cached for this log version"""
+        self.flush()
+        if path is not None:
+            fmt = plot_format(path)
+            cache = FigureCache(FigureCache.path_for(self.path))
+            key = figure_key(name, self.storage.signature(), figsize=figsize, fmt=fmt, **params)
+            cached_path = cache.get(name, key, fmt)
+
+        # Nothing to import or draw when the log did not change
+        if path is None or cached_path is None:
+            with span("import plotting"):
+                import matplotlib.pyplot as plt
+                from matplotlib.figure import Figure
+                import seaborn as sns
+
+            # Setting plot context 
+            sns.set_context("notebook")  
+            sns.set_style("darkgrid")
+
+        if path is None:
+            plt.figure(figsize=figsize)
+            with span("render"):
+                draw(plt.gca(), **params)
+            with span("show"):
+                plt.show()
+            return None
+
+        if cached_path is None:
+            # A bare Figure draws on Agg, no display or pyplot state involved
+            figure = Figure(figsize=figsize)
+            with span("render"):
+                draw(figure.add_subplot(), **params)
+            with span("save"):
+                cached_path = cache.put(name, key, fmt, figure)
+
+        if os.path.abspath(cached_path) != os.path.abspath(path):
+            shutil.copyfile(cached_path, path)
+        print(f"Plot saved at: {path}")
+        return path
+
+
+    def _draw_sessions(self, ax, max_points: int):
+        # Computing total seconds
+        if self.storage.queries_in_sql:
+            seconds = self.storage.session_totals()
+        else:
+            seconds = self._open_log()["total_time"].dt.total_seconds()
+        draw_figure(ax, sessions_figure(seconds, max_points))
 
 
-    def display_time_by(self, by="subject"):
+    def _draw_days_total(self, ax, chunksize: int, max_points: int):
+        # Aggregate days
+        seconds = self._total_by("day", chunksize).dt.total_seconds()
+        draw_figure(ax, days_figure(seconds, max_points))
+
 
-        df = self._open_log()
+    def display_time_by(self, by="subject", chunksize: int = None, since=None, until=None):
 
-        # Group by subject and sum the total_time
-        total_time_by_subject = df.groupby(by)['total_time'].sum()
+        # Group by subject and sum the total_time, of a date range if given
+        if since is not None or until is not None:
+            total_time_by_subject = self.time_between(by, since, until)
+        else:
+            total_time_by_subject = self._total_by(by, chunksize)
 
         # Optionally, format the total time as HH:MM:SS
-        total_time_by_subject = total_time_by_subject.apply(
-            lambda x: f"{int(x.total_seconds() // 3600):02}:{int((x.total_seconds() % 3600) // 60):02}:{int(x.total_seconds() % 60):02}"
-        )
+        with span("format totals"):
+            total_time_by_subject = total_time_by_subject.apply(
+                lambda x: f"{int(x.total_seconds() // 3600):02}:{int((x.total_seconds() % 3600) // 60):02}:{int(x.total_seconds() % 60):02}"
+            )
 
-        print(total_time_by_subject)
+            print(total_time_by_subject)
 
 
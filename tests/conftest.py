@@ -0,0 +1,25 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# The modules live at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import CSVStorage
+
+
+def session(start_time: datetime, minutes: int = 30, subject: str = "Thesis", session: str = "Morning") -> dict:
+    """A session as StudyTracker.end_session saves it"""
+    end_time = start_time + timedelta(minutes=minutes)
+    return {"day": start_time.date(), "start_time": start_time, "end_time": end_time,
+            "total_time": end_time - start_time, "session": session, "subject": subject}
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    """An empty csv log"""
+    path = str(tmp_path / "study_sessions.csv")
+    CSVStorage(path).create()
+    return path
@@ -0,0 +1,24 @@
+import json
+from datetime import datetime, timezone
+
+from importer import read_sessions
+from study_tracker import StudyTracker
+
+
+def test_times_with_utc_offsets_are_imported_as_local_times(tmp_path, log_path):
+    path = tmp_path / "sessions.jsonl"
+    sessions = [
+        {"start_time": "2025-01-01T08:00:00Z", "end_time": "2025-01-01T09:00:00Z", "subject": "Thesis", "period": "Morning"},
+        {"start_time": "2025-01-02T08:00:00+02:00", "end_time": "2025-01-02T08:30:00+02:00", "subject": "PIF", "period": "Morning"},
+        {"start_time": "2025-01-03 08:00:00", "end_time": "2025-01-03 08:45:00", "subject": "DIV", "period": "Morning"},
+    ]
+    path.write_text("\n".join(json.dumps(row) for row in sessions))
+
+    df_new = read_sessions(str(path))
+    expected = datetime(2025, 1, 1, 8, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert df_new["start_time"].iloc[0] == expected
+    assert df_new["start_time"].iloc[2] == datetime(2025, 1, 3, 8)
+    assert df_new["total_time"].dt.total_seconds().tolist() == [3600, 1800, 2700]
+
+    imported, skipped = StudyTracker(log_path).import_sessions(str(path))
+    assert (imported, skipped) == (3, 0)
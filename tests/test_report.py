@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+from report import report_dirs
+
+
+def test_logs_with_the_same_name_get_their_own_directory():
+    paths = ["team/alice/study_sessions.csv", "team/bob/study_sessions.csv"]
+    assert report_dirs(paths, "out") == {paths[0]: os.path.join("out", "alice", "study_sessions"),
+                                         paths[1]: os.path.join("out", "bob", "study_sessions")}
+
+
+def test_logs_sharing_a_directory_are_rejected():
+    with pytest.raises(ValueError):
+        report_dirs(["team/alice/study_sessions.csv", "team/alice/study_sessions.db"], "out")
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from conftest import session
+from storage import CSVStorage
+
+
+def write_log_without_newline(path):
+    """Two sessions, the last row not terminated, like a log saved by an editor"""
+    storage = CSVStorage(path)
+    storage.append(session(datetime(2025, 1, 1, 8)))
+    storage.append(session(datetime(2025, 1, 1, 9), subject="PIF"))
+    with open(path, "rb") as f:
+        content = f.read()
+    with open(path, "wb") as f:
+        f.write(content.rstrip(b"\n"))
+
+
+def test_last_row_without_newline_is_read(log_path):
+    write_log_without_newline(log_path)
+    storage = CSVStorage(log_path)
+
+    assert len(storage.read_log()) == 2
+    # Also from the synced snapshot, and once the next append terminates the row
+    assert len(storage.read_log()) == 2
+    storage.append(session(datetime(2025, 1, 1, 10)))
+    df_log = storage.read_log()
+    assert list(df_log["subject"]) == ["Thesis", "PIF", "Thesis"]
+    assert df_log.equals(storage._read_csv(log_path))
+
+
+def test_edit_by_hand_of_the_same_length_is_read(log_path):
+    storage = CSVStorage(log_path)
+    for hour in range(8, 12):
+        storage.append(session(datetime(2025, 1, 1, hour)))
+    storage.read_log()
+
+    with open(log_path) as f:
+        content = f.read()
+    with open(log_path, "w") as f:
+        f.write(content.replace("0 days 00:30:00", "0 days 00:40:00", 1))
+
+    df_log = storage.read_log()
+    assert df_log["total_time"].dt.total_seconds().tolist() == [2400, 1800, 1800, 1800]
+
+
+def test_appends_sync_incrementally(log_path):
+    storage = CSVStorage(log_path)
+    storage.append(session(datetime(2025, 1, 1, 8)))
+    storage.read_log()
+    storage.append(session(datetime(2025, 1, 2, 8), subject="New"))
+
+    df_log = storage.read_log()
+    assert df_log.equals(storage._read_csv(log_path))
+    assert list(df_log["subject"].cat.categories) == ["New", "Thesis"]
@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+
+from conftest import session
+from rollups import Rollups
+from storage import CSVStorage, _csv_row
+from study_tracker import StudyTracker
+
+
+def test_rollups_count_rows_queued_by_other_writers(log_path):
+    tracker = StudyTracker(log_path)
+    tracker.storage.append(session(datetime(2025, 1, 1, 8)))
+    tracker.rebuild_rollups()
+
+    # Another process queued its session, this commit writes both
+    other = session(datetime(2025, 1, 1, 10), subject="Valuation")
+    with open(CSVStorage(log_path).spool_path, "a") as spool:
+        spool.write(json.dumps(["other-writer"] + _csv_row(None, other)[1:]) + "\n")
+    tracker.storage.append(session(datetime(2025, 1, 1, 9)), tracker._log_written)
+
+    rollups = Rollups(tracker.rollups_path)
+    assert rollups.load() and rollups.is_current(tracker.storage.signature())
+    assert rollups.total_by("subject").to_dict() == tracker.rebuild_rollups().total_by("subject").to_dict()
+    assert len(tracker._open_log()) == 3
+
+
+def test_range_reads_last_row_without_newline(log_path):
+    storage = CSVStorage(log_path)
+    storage.append(session(datetime(2025, 1, 1, 8)))
+    storage.append(session(datetime(2025, 1, 2, 8), subject="PIF"))
+    with open(log_path, "rb") as f:
+        content = f.read()
+    with open(log_path, "wb") as f:
+        f.write(content.rstrip(b"\n"))
+
+    assert list(storage.read_range("2025-01-02", "2025-01-02")["subject"]) == ["PIF"]
+    assert len(storage.read_range()) == 2
+
+
+def test_day_index_stops_before_a_partial_row(tmp_path):
+    from day_index import DayIndex
+
+    path = tmp_path / "study_sessions.csv"
+    path.write_bytes(b",day,start_time\n0,2025-01-01,x\n1,2025-01-0")
+    index = DayIndex(str(tmp_path / "days.json"))
+    index.refresh(str(path), (0, 1))
+    assert index.days == ["2025-01-01"]
+
+    with open(path, "ab") as f:
+        f.write(b"2,x\n")
+    index.refresh(str(path), (0, 2))
+    assert index.days == ["2025-01-01", "2025-01-02"]
+    assert index.size == path.stat().st_size
+
+
+def test_range_reads_notice_rows_removed_by_hand(log_path):
+    storage = CSVStorage(log_path)
+    for day in (1, 2, 3):
+        storage.append(session(datetime(2025, 1, day, 8)))
+        storage.append(session(datetime(2025, 1, day, 9), subject="PIF"))
+    assert len(storage.read_range("2025-01-02", "2025-01-02")) == 2
+
+    # Shifts every indexed offset after the first row
+    with open(log_path, "rb") as f:
+        lines = f.readlines()
+    with open(log_path, "wb") as f:
+        f.writelines(lines[:1] + lines[2:])
+    storage.append(session(datetime(2025, 1, 4, 8)))
+
+    df_day = storage.read_range("2025-01-02", "2025-01-02")
+    assert list(df_day["subject"]) == ["Thesis", "PIF"]
+    assert len(storage.read_range()) == 6
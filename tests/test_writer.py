@@ -0,0 +1,50 @@
+import os
+from datetime import datetime
+
+import pytest
+
+import storage
+from conftest import session
+from daemon import SessionDaemon
+from study_tracker import StudyTracker
+from utils import SESSION_FILE
+
+
+def fail_once(monkeypatch):
+    """Make the next write to a csv log fail, as with a full disk"""
+    append_csv_rows = storage.append_csv_rows
+
+    def failing(path, rows):
+        monkeypatch.setattr(storage, "append_csv_rows", append_csv_rows)
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(storage, "append_csv_rows", failing)
+
+
+def test_failed_write_is_not_counted_nor_committed_later(monkeypatch, log_path):
+    tracker = StudyTracker(log_path)
+    fail_once(monkeypatch)
+    tracker.writer.submit(session(datetime(2025, 1, 1, 8), minutes=60))
+    with pytest.raises(OSError):
+        tracker.flush()
+    assert tracker.writer.pending() == []
+
+    # The next commit must not write the failed session behind the caller's back
+    tracker.writer.submit(session(datetime(2025, 1, 1, 10)))
+    tracker.flush()
+    assert [row["start_time"].hour for row in tracker.storage.read_day("2025-01-01")] == [10]
+
+
+def test_daemon_end_can_be_retried_after_a_failed_write(monkeypatch, tmp_path, log_path):
+    monkeypatch.chdir(tmp_path)
+    daemon = SessionDaemon(log_path, str(tmp_path / "tracker.sock"))
+    assert daemon.handle({"command": "start", "subject": "Thesis", "period": "Morning"})["ok"]
+
+    fail_once(monkeypatch)
+    response = daemon.handle({"command": "end"})
+    assert not response["ok"] and "could not be saved" in response["message"]
+    assert daemon.tracker.is_studying and os.path.exists(SESSION_FILE)
+
+    assert daemon.handle({"command": "end"})["ok"]
+    assert not os.path.exists(SESSION_FILE)
+    assert len(daemon.tracker.storage.read_log()) == 1
@@ -0,0 +1,83 @@
+import sys
+import threading
+import time
+
+
+class Ticker:
+    """Redraw the timers of the running sessions once per second on one line.
+
+    A single thread serves every session of the process. It sleeps until the
+    next wall clock second, so the timers tick together and do not drift,
+    and it exits as soon as the last session is removed. Nothing is drawn,
+    and no thread started, when the output is not a terminal.
+    """
+
+    def __init__(self, stream=None) -> None:
+        # None follows sys.stdout, also when it is redirected later
+        self.stream = stream
+        self.lock = threading.Lock()
+        # key -> (label, render), render(now) returns the text of that timer
+        self.timers = {}
+        self._stop = None
+        self._thread = None
+        self._drawn = False
+
+    def interactive(self) -> bool:
+        """True if redraws can be seen, i.e. the output is a terminal"""
+        stream = self.stream or sys.stdout
+        try:
+            return stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def add(self, key, label: str, render):
+        """Show a timer until remove(key), the first one starts the thread"""
+        with self.lock:
+            self.timers[key] = (label, render)
+            if self._thread is None and self.interactive():
+                # A fresh event per thread, a stopping thread never misses its own
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), name="ticker", daemon=True)
+                self._thread.start()
+            if self._thread is not None:
+                self._draw(time.time())
+
+    def remove(self, key):
+        """Stop showing a timer, the thread stops at once with the last one"""
+        with self.lock:
+            if self.timers.pop(key, None) is None:
+                return
+            if not self.timers and self._thread is not None:
+                self._stop.set()
+                self._thread = None
+            # Whatever is printed next starts on its own line
+            if self._drawn:
+                self._write("\n")
+                self._drawn = False
+
+    def _run(self, stop: threading.Event):
+        # wait() returns True only once stopped
+        while not stop.wait(1 - time.time() % 1):
+            with self.lock:
+                if stop.is_set():
+                    return
+                self._draw(time.time())
+
+    def _draw(self, now: float):
+        """Rewrite the line, call with the lock held"""
+        timers = list(self.timers.values())
+        if len(timers) == 1:
+            line = timers[0][1](now)
+        else:
+            line = " || ".join(f"[{label}] {render(now)}" for label, render in timers)
+        self._write(f"\r{line}")
+        self._drawn = True
+
+    def _write(self, text: str):
+        stream = self.stream or sys.stdout
+        stream.write(text)
+        stream.flush()
+
+
+# Shared by every tracker of the process
+TICKER = Ticker()
@@ -1,4 +1,13 @@
-from datetime import timedelta
+import contextlib
+import csv
+import fcntl
+import io
+import os
+import zlib
+from datetime import datetime, timedelta
+
+# Marker of the session in progress, shared by the CLI and the daemon
+SESSION_FILE = "./.session_active"
 
 def seconds_to_hms(x, pos):
     hours, remainder = divmod(int(x), 3600)
@@ -11,4 +20,122 @@ def format_timedelta_hms(delta):
     total_seconds = int(delta.total_seconds())
     hours, remainder = divmod(total_seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02}:{minutes:02}:{seconds:02}"
\ No newline at end of file
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
+
+def read_session_file(session_file=SESSION_FILE):
+    """Read subject, period and start time of the active session, None if unavailable"""
+    with open(session_file, 'r') as f:
+        session_info = f.read().strip().split(',')
+    if len(session_info) >= 3:
+        return session_info[0], session_info[1], datetime.fromisoformat(session_info[2])
+    return None
+
+
+def write_session_file(subject, period, start_time, session_file=SESSION_FILE):
+    """Record the active session so that other processes can end it"""
+    with open(session_file, 'w') as f:
+        f.write(f"{subject},{period},{start_time.isoformat()}")
+
+
+def format_timedelta_log(delta):
+    """Formats a timedelta the way pandas writes it to the log, e.g. 0 days 01:11:15.885343."""
+    hours, remainder = divmod(delta.seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{delta.days} days {hours:02}:{minutes:02}:{seconds:02}.{delta.microseconds:06}"
+
+
+def parse_timedelta_log(text):
+    """Parses a duration written in the log, e.g. 0 days 01:11:15.885343 or 1:11:15.885343."""
+    days, _, clock = text.rpartition(" days ")
+    hours, minutes, seconds = clock.split(":")
+    seconds, _, fraction = seconds.partition(".")
+    return timedelta(days=int(days or 0), hours=int(hours), minutes=int(minutes),
+                     seconds=int(seconds), microseconds=int(fraction[:6].ljust(6, "0")) if fraction else 0)
+
+
+def iter_lines_reversed(path, block_size=8192):
+    """Yields the non-empty lines of a file from the last one to the first, reading it backwards in blocks."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + remainder).split(b"\n")
+
+            # The first piece may be cut in half, keep it for the next block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                line = line.rstrip(b"\r")
+                if line:
+                    yield line.decode("utf-8")
+
+        remainder = remainder.rstrip(b"\r")
+        if remainder:
+            yield remainder.decode("utf-8")
+
+
+def read_last_line(path, block_size=4096):
+    """Returns the last non-empty line of a file, reading it backwards from the end."""
+    return next(iter_lines_reversed(path, block_size), "")
+
+
+def prefix_checksum(path, size, block_size=1 << 20):
+    """Returns the crc32 of the first size bytes of a file, None if it is shorter."""
+    checksum, remaining = 0, size
+    with open(path, "rb") as f:
+        while remaining:
+            block = f.read(min(remaining, block_size))
+            if not block:
+                return None
+            checksum = zlib.crc32(block, checksum)
+            remaining -= len(block)
+    return checksum
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Holds an exclusive lock on a file shared by every process opening it, yields the open file."""
+    with open(path, "a+") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            # Writes must land before another process gets the lock
+            f.flush()
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def shared_file_lock(path):
+    """Holds a shared lock on a file: other shared holders are let in, file_lock waits for all of them."""
+    try:
+        f = open(path, "a+")
+    except OSError:
+        # e.g. a read-only folder, nobody can take the lock to write there either
+        yield
+        return
+    with f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def append_csv_rows(path, rows):
+    """Appends rows to a csv file in a single write and flushes it to disk."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    line = buffer.getvalue().encode("utf-8")
+
+    with open(path, "ab+") as f:
+        # Terminate the previous row if the file does not end with a newline
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                line = b"\n" + line
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
@@ -0,0 +1,67 @@
+import atexit
+import queue
+import sys
+import threading
+
+# Sessions waiting to be written before save() blocks
+WRITE_QUEUE_SIZE = 64
+
+
+class BackgroundWriter:
+    """Append sessions to a log on a background thread.
+
+    submit() returns as soon as the session is queued. Sessions still queued
+    are written by flush(), which also runs when the process exits, so a
+    session handed to the writer is never dropped silently: one that cannot
+    be written leaves pending() and flush() raises its error, the caller
+    still holds the session and can save it again.
+    """
+
+    def __init__(self, storage, on_written=None, maxsize: int = WRITE_QUEUE_SIZE) -> None:
+        self.storage = storage
+        # Passed to storage.append, see LogStorage.append
+        self.on_written = on_written
+        self.queue = queue.Queue(maxsize)
+        # Held while a session is written, pending() never misses nor repeats one
+        self.lock = threading.Lock()
+        self.errors = []
+        self._pending = []
+        self._thread = None
+
+    def submit(self, data: dict):
+        """Queue a session, waiting only if the queue is full"""
+        with self.lock:
+            self._pending.append(data)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+        self.queue.put(data)
+
+    def pending(self) -> list:
+        """Sessions submitted and not written yet, call with the lock held"""
+        return list(self._pending)
+
+    def flush(self):
+        """Wait until every queued session is written, raise the first write error"""
+        if self._thread is not None:
+            self.queue.join()
+        if self.errors:
+            error, self.errors = self.errors[0], []
+            raise error
+
+    def _run(self):
+        while True:
+            data = self.queue.get()
+            try:
+                with self.lock:
+                    self.storage.append(data, self.on_written)
+                    self._pending.remove(data)
+            except Exception as e:
+                # Not in the log, so not pending either, flush reports it
+                with self.lock:
+                    self._pending.remove(data)
+                print(f"Error saving the session: {e}", file=sys.stderr)
+                self.errors.append(e)
+            finally:
+                self.queue.task_done()